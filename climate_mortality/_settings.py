@@ -0,0 +1,18 @@
+'''Lazy, cached access to the files.yaml configuration.
+
+Each module used to open and parse './files.yaml' at import time, so
+importing the package paid the disk read and YAML parse once per module,
+and the relative path broke whenever the working directory was not the
+repository root. Resolving against this file's location and caching the
+parse fixes both.
+'''
+from functools import lru_cache
+from pathlib import Path
+from yaml import safe_load
+
+
+@lru_cache(maxsize=1)
+def get_settings():
+    '''Parse files.yaml once and return the cached result.'''
+    with open(Path(__file__).parent.parent / 'files.yaml', 'r') as fp:
+        return safe_load(fp)
@@ -0,0 +1,45 @@
+'''Helpers shared by the display modules.
+
+plot_noaa.py and plot_cmip5.py grew separate copies of the month-name table
+and the colorscale chooser. Keeping a single copy here means the tables are
+built once per process and the two modules cannot drift apart.
+'''
+
+MONTH_NAMES = {
+    1: 'January',
+    2: 'February',
+    3: 'March',
+    4: 'April',
+    5: 'May',
+    6: 'June',
+    7: 'July',
+    8: 'August',
+    9: 'September',
+    10: 'October',
+    11: 'November',
+    12: 'December'
+}
+
+
+def render(fig, to_file=None):
+    '''Show a figure in the browser, or write a PNG when <to_file> is given.
+
+    Kaleido renders headlessly, so batch drivers can emit every sample in
+    one pass instead of blocking on a browser tab per figure. This replaces
+    the old orca route for programmatic saves.
+    '''
+    if to_file:
+        fig.write_image(to_file, width=1600, height=900)
+    else:
+        fig.show()
+
+
+def get_var_colorscale(var):
+    '''Choose a colorscale which visually corresponds to the given variable.'''
+    if var=='PRCP':
+        # list several options but only return one
+        return ['ylgn', 'speed', 'bluyl'][2]
+    elif var=='HUMID':
+        return 'portland'
+    else:
+        return 'bluered'
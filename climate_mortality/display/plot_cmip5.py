@@ -6,8 +6,13 @@ them programmatically requires installing an "orca" executable.
 import pandas as pd
 import plotly.graph_objects as go
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from os.path import join
-from yaml import safe_load
+
+from .._settings import get_settings
+from ..utils.noaa_reader import read_cached_csv
+from ._plot_common import MONTH_NAMES, get_var_colorscale, render
 
 VAR2DIR =  {
     'PRCP': 'prec',
@@ -21,16 +26,68 @@ VAR2FILE = {
     for var, dirname in VAR2DIR.items()
 }
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+# (lon_min, lon_max, lat_min, lat_max) window the CMIP5 plots display. The
+# processed files are global, so rows outside this box are never shown.
+CONUS_BBOX = (-126, -64, 23, 51)
+
+# The high-resolution grids put tens of thousands of markers on screen,
+# which chokes the SVG renderer behind Scattergeo; like the NOAA maps,
+# these draw through WebGL via Scattermap instead.
+MAP_LAYOUT = {
+    'style': 'open-street-map',
+    'center': {
+        'lon': (CONUS_BBOX[0] + CONUS_BBOX[1]) / 2,
+        'lat': (CONUS_BBOX[2] + CONUS_BBOX[3]) / 2,
+    },
+    'zoom': 3,
+}
+
+# Title templates and month names are built once here instead of on every
+# make_CMIP5_title call.
+CMIP5_TITLE_FMT = {
+    "EMNT": 'Lowest recorded temperature for {month} in Celsius during the {decade}s',
+    "PRCP": 'Total precipitation for {month} in mm during the {decade}s',
+    "TAVG": 'Average temperature for {month} in degrees Celsius during the {decade}s',
+    "EMXT": 'Highest recorded temperature for {month} in Celsius during the {decade}s',
+    "TMAX": 'Average daily high temperature for {month} in Celsius during the {decade}s',
+    "TMIN": 'Average daily low temperature for {month} in Celsius during the {decade}s',
+}
 
 ##### utility functions #####
 
-def load_CMIP5(directory, fname):
-    '''Load CMIP5 data for a single variable in a given month.'''
-    return pd.read_csv(
-        join(settings['cmip5']['output_dir'], directory, fname)
-    )
+def load_CMIP5(directory, fname, var, bbox=None):
+    '''Load CMIP5 data for a single variable in a given month.
+
+    Only the three columns the plots actually use are read, as float32;
+    display precision doesn't need 64-bit floats, and halving the width
+    halves the memory and serialization cost.
+
+    <bbox> is an optional (lon_min, lon_max, lat_min, lat_max) window. When
+    given, the CSV is read in chunks and only rows inside the window are
+    kept, so peak memory stays at one chunk even for the high-resolution
+    grids that forced the 30s dataset out of the project.
+    '''
+    columns = ['LONGITUDE', 'LATITUDE', var]
+    dtype = {col: 'float32' for col in columns}
+    path = join(get_settings()['cmip5']['output_dir'], directory, fname)
+
+    if bbox is None:
+        return read_cached_csv(path, columns=columns, dtype=dtype)
+
+    lon_min, lon_max, lat_min, lat_max = bbox
+    filtered = [
+        chunk[
+            chunk['LONGITUDE'].between(lon_min, lon_max)
+            & chunk['LATITUDE'].between(lat_min, lat_max)
+        ]
+        for chunk in pd.read_csv(
+            path,
+            chunksize=200000,
+            usecols=columns,
+            dtype=dtype
+        )
+    ]
+    return pd.concat(filtered, ignore_index=True)
 
 
 def mk_CMIP5_dir_name(model, scenario, decade, var):
@@ -38,83 +95,66 @@ def mk_CMIP5_dir_name(model, scenario, decade, var):
     return f'{model}_rcp{scenario}_{decade}s_{dirvar}_10min_r1i1p1_no_tile_asc'
 
 
+@lru_cache(maxsize=None)
 def make_CMIP5_title(var, decade, month):
-    fmt_dict = {
-        "EMNT": 'Lowest recorded temperature for {month} in Celsius during the {decade}s',
-        "PRCP": 'Total precipitation for {month} in mm during the {decade}s',
-        "TAVG": 'Average temperature for {month} in degrees Celsius during the {decade}s',
-        "EMXT": 'Highest recorded temperature for {month} in Celsius during the {decade}s',
-        "TMAX": 'Average daily high temperature for {month} in Celsius during the {decade}s',
-        "TMIN": 'Average daily low temperature for {month} in Celsius during the {decade}s',
-    }
-    month_dict = [
-        'January',
-        'February',
-        'March',
-        'April',
-        'May',
-        'June',
-        'July',
-        'August',
-        'September',
-        'October',
-        'November',
-        'December'
-    ]
-    return fmt_dict[var].format(month=month_dict[month-1], decade=decade)
-
+    return CMIP5_TITLE_FMT[var].format(
+        month=MONTH_NAMES[month],
+        decade=decade
+    )
 
-def get_CMIP5_colorscale(var):
-    '''Choose a colorscale which visually corresponds to the given variable.'''
-    if var=='PRCP':
-        # list several options but only return one
-        return ['ylgn', 'speed', 'bluyl'][2]
-    else:
-        return 'bluered'
 
 ##### direct-output data-plot functions #####
 
-def plot_CMIP5_var(directory, decade, var, month):
-    '''Plot global CMIP5 data for a single variable in a given month.'''
-    fname = VAR2FILE[var].format(month=month)
-    df = load_CMIP5(directory, fname)
-    fig = go.Figure(
-        data=go.Scattergeo(
-            lon=df['LONGITUDE'],
-            lat=df['LATITUDE'],
-            text=df[var],
+def plot_CMIP5_var(directory, decade, var, month, df=None, to_file=None):
+    '''Plot global CMIP5 data for a single variable in a given month.
+
+    <df> is an optional preloaded dataframe; drivers which prefetch several
+    datasets in parallel pass it to skip the load here.
+    '''
+    if df is None:
+        fname = VAR2FILE[var].format(month=month)
+        df = load_CMIP5(directory, fname, var, bbox=CONUS_BBOX)
+    render(go.Figure(
+        data=go.Scattermap(
+            # Handing plotly bare arrays skips its per-Series index
+            # handling and serializes the float32 columns as-is.
+            lon=df['LONGITUDE'].to_numpy(),
+            lat=df['LATITUDE'].to_numpy(),
             mode='markers',
-            marker_color=df[var],
             marker={
-                'colorscale': get_CMIP5_colorscale(var),
+                'color': df[var].to_numpy(),
+                'colorscale': get_var_colorscale(var),
                 'showscale': True
             },
+            hovertemplate='%{marker.color:.2f}<extra></extra>',
         ),
         layout={
             'title': {'text': make_CMIP5_title(var, decade, month)},
-            #'xaxis': {'range': [-65, -125]},
-            #'yaxis': {'range': [24, 50]},
-            #'margin': {"r":0,"t":0,"l":0,"b":0},
-            'geo': {
-                'lonaxis_range': [-126, -64],
-                'lataxis_range': [23, 51],
-                'showlakes': True,
-                'showrivers': True,
-            },
+            'map': MAP_LAYOUT,
         }
-    ).show()
+    ), to_file)
 
 
-def _plot_one_CMIP5_sample(model, scenario, decade, var, month):
+def _sample_directory(model, scenario, decade, var):
     dataset = mk_CMIP5_dir_name(model, scenario, decade, var)
-    directory = join(
-        settings['cmip5']['output_dir'],
+    return join(
+        get_settings()['cmip5']['output_dir'],
         dataset,
     )
-    plot_CMIP5_var(directory, decade, var, month)
 
 
-def plot_CMIP5_samples():
+def _plot_one_CMIP5_sample(model, scenario, decade, var, month, df=None, to_file=None):
+    directory = _sample_directory(model, scenario, decade, var)
+    plot_CMIP5_var(directory, decade, var, month, df=df, to_file=to_file)
+
+
+def _load_one_CMIP5_sample(model, scenario, decade, var, month):
+    directory = _sample_directory(model, scenario, decade, var)
+    fname = VAR2FILE[var].format(month=month)
+    return load_CMIP5(directory, fname, var, bbox=CONUS_BBOX)
+
+
+def plot_CMIP5_samples(out_dir=None):
     '''A collection of several CMIP5 datasets demonstrating data breadth.'''
     # cccma_canesm2_rcp4_5_2030s_prec_30s_r1i1p1_b2_asc dataset was used in
     # early drafts, but hs been dropped due to excessively high resolution
@@ -124,31 +164,51 @@ def plot_CMIP5_samples():
     #    'PRCP',
     #    7
     #)
-    _plot_one_CMIP5_sample(
-        model='cesm1_cam5',
-        scenario='4_5',
-        decade='2030',
-        var='PRCP',
-        month=6
-    )
-    _plot_one_CMIP5_sample(
-        model='cccma_canesm2',
-        scenario='8_5',
-        decade='2050',
-        var='TMAX',
-        month=7
-    )
-    _plot_one_CMIP5_sample(
-        model='csiro_mk3_6_0',
-        scenario='4_5',
-        decade='2050',
-        var='TMIN',
-        month=8
-    )
-    _plot_one_CMIP5_sample(
-        model='gfdl_esm2g',
-        scenario='8_5',
-        decade='2050',
-        var='TAVG',
-        month=9
-    )
+    specs = [
+        {
+            'model': 'cesm1_cam5',
+            'scenario': '4_5',
+            'decade': '2030',
+            'var': 'PRCP',
+            'month': 6
+        },
+        {
+            'model': 'cccma_canesm2',
+            'scenario': '8_5',
+            'decade': '2050',
+            'var': 'TMAX',
+            'month': 7
+        },
+        {
+            'model': 'csiro_mk3_6_0',
+            'scenario': '4_5',
+            'decade': '2050',
+            'var': 'TMIN',
+            'month': 8
+        },
+        {
+            'model': 'gfdl_esm2g',
+            'scenario': '8_5',
+            'decade': '2050',
+            'var': 'TAVG',
+            'month': 9
+        },
+    ]
+    # The chunked CSV reads dominate this driver's wall time and release the
+    # GIL, so prefetch them in parallel; rendering stays on the main thread.
+    with ThreadPoolExecutor() as executor:
+        futures = [
+            executor.submit(_load_one_CMIP5_sample, **spec)
+            for spec in specs
+        ]
+
+        for spec, future in zip(specs, futures):
+            to_file = None
+
+            if out_dir:
+                to_file = join(
+                    out_dir,
+                    'CMIP5_{model}_{var}_{month}.png'.format(**spec)
+                )
+
+            _plot_one_CMIP5_sample(df=future.result(), to_file=to_file, **spec)
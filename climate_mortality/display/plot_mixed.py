@@ -6,13 +6,38 @@ them programmatically requires installing an "orca" executable.
 import pandas as pd
 import plotly.graph_objects as go
 
-from os.path import join
-from yaml import safe_load
+from functools import lru_cache
 
 from ..utils.connect_noaa_who import load_country_climate_df
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+# The combined climate dataframe is read-only for plotting, so the driver
+# functions below can share a single cached copy instead of re-reading it
+# from disk on every plot.
+@lru_cache(maxsize=1)
+def _cached_df():
+    df = load_country_climate_df()
+    # Categorical countries turn every country mask below into an integer
+    # compare instead of a per-row string compare, and shrink the column.
+    df['country'] = df['country'].astype('category')
+    return df
+
+
+@lru_cache(maxsize=1)
+def _by_country():
+    '''Partition the cached climate frame into per-country subframes.
+
+    One O(N) groupby pass up front makes every later country lookup a dict
+    access, so drivers like plot_country_var_histories stop rescanning the
+    full frame per call.
+    '''
+    return {
+        country: group
+        for country, group in _cached_df().groupby(
+            'country',
+            sort=False,
+            observed=True
+        )
+    }
 
 VAR_DESCRIPTIONS = {
     "TMIN": 'Monthly average of daily low temperatures (C)',
@@ -26,17 +51,10 @@ VAR_DESCRIPTIONS = {
 
 def plot_single_country_var(country, var):
     '''Plot one country's variation in a single climate variation over time.'''
-    df = load_country_climate_df()[[
-        'country',
-        var+'_min',
-        var+'_mean',
-        var+'_max',
-        'Year',
-    ]]
     # Next line is useful if looking for a specific country but unsure of the
     # name it's given in the dataset.
-    # print(sorted(set(df['country'])))
-    df = df[df['country']==country][[
+    # print(sorted(_by_country()))
+    df = _by_country()[country][[
         var+'_min',
         var+'_mean',
         var+'_max',
@@ -45,21 +63,21 @@ def plot_single_country_var(country, var):
     descrip = VAR_DESCRIPTIONS[var]
     go.Figure(
         data=[
-            go.Scatter(
+            go.Scattergl(
                 x=df['Year'],
                 y=df[var + '_min'],
                 name='Annual minimum',
                 mode='lines',
                 line={'color': 'black'},
             ),
-            go.Scatter(
+            go.Scattergl(
                 x=df['Year'],
                 y=df[var + '_mean'],
                 name='Annual average',
                 mode='lines',
                 line={'color': 'blue'},
             ),
-            go.Scatter(
+            go.Scattergl(
                 x=df['Year'],
                 y=df[var + '_max'],
                 name='Annual maximum',
@@ -80,29 +98,31 @@ def plot_country_comparisons(base_var, aggregation='mean', countries=None):
     or 'max'.
     '''
     var = base_var + '_' + aggregation
-    df = load_country_climate_df()[[
+    df = _cached_df()[[
         'country',
         'Year',
         var
     ]]
     
-    if countries is None:
-        countries = sorted(set(df['country']))
+    if countries is not None:
+        df = df[df['country'].isin(countries)]
 
     long_agg_name = {
         'min': 'Annual minimum of ' + VAR_DESCRIPTIONS[base_var],
         'mean': 'Annual average of ' + VAR_DESCRIPTIONS[base_var],
         'max': 'Annual maximum of ' + VAR_DESCRIPTIONS[base_var],
     }
+    # A single groupby pass replaces the per-country boolean masks, which
+    # each rescanned the full 'country' column.
     go.Figure(
         data=[
-            go.Scatter(
-                x=df[df['country']==country]['Year'],
-                y=df[df['country']==country][var],
+            go.Scattergl(
+                x=group['Year'],
+                y=group[var],
                 name=country,
                 mode='lines',
             )
-            for country in countries
+            for country, group in df.groupby('country', sort=True, observed=True)
         ],
         layout={
             'title': {'text': long_agg_name[aggregation]},
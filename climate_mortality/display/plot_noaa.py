@@ -6,182 +6,285 @@ them programmatically requires installing an "orca" executable.
 import pandas as pd
 import plotly.graph_objects as go
 
+from plotly.subplots import make_subplots
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 from numpy import array
 from os.path import join
 from scipy.interpolate import griddata
-from yaml import safe_load
 
 from ..utils import load_annualized_NOAA, load_interpolated_NOAA, load_compiled_NOAA
+from ._plot_common import MONTH_NAMES, get_var_colorscale, render
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
-
-MONTH_NAMES = {
-    1: 'January',
-    2: 'February',
-    3: 'March',
-    4: 'April',
-    5: 'May',
-    6: 'June',
-    7: 'July',
-    8: 'August',
-    9: 'September',
-    10: 'October',
-    11: 'November',
-    12: 'December'
+# The NOAA grids run to tens of thousands of points, which overwhelms the
+# SVG renderer behind Scattergeo. Scattermap draws through WebGL instead,
+# so the whole grid stays interactive in the browser.
+MAP_LAYOUT = {
+    'style': 'open-street-map',
+    'center': {'lon': 0, 'lat': 20},
+    'zoom': 1,
 }
 
 ##### utility functions #####
 
+def _downsample(df, var, max_points=20000):
+    '''Spatially bin a point map so at most ~<max_points> reach the browser.
+
+    At world-scale zoom the screen cannot resolve every station or grid cell,
+    so extra points are pure bandwidth and render cost. Points are binned to
+    a square lon/lat grid sized to land near <max_points>, and each occupied
+    bin is replaced by its centroid and mean value.
+    '''
+    if len(df) <= max_points:
+        return df
+
+    # Solve (360/step) * (180/step) ~= max_points for the bin edge length.
+    step = (360.0 * 180.0 / max_points) ** 0.5
+    df = df[['LONGITUDE', 'LATITUDE', var]].copy()
+    df['lon_bin'] = (df['LONGITUDE'] // step).astype(int)
+    df['lat_bin'] = (df['LATITUDE'] // step).astype(int)
+    return df.groupby(['lon_bin', 'lat_bin'], sort=False).agg({
+        'LONGITUDE': 'mean',
+        'LATITUDE': 'mean',
+        var: 'mean',
+    }).reset_index(drop=True)
+
+
+NOAA_RAW_TITLE_FMT = {
+    "EMNT": 'Lowest recorded temperature for {month} {year} in degrees Celsius',
+    "PRCP": 'Total precipitation for {month} {year} in mm',
+    "TAVG": 'Average temperature for {month} {year} in degrees Celsius',
+    "EMXT": 'Highest recorded temperature for {month} {year} in degrees Celsius',
+    "TMAX": 'Average daily high temperature for {month} {year} in degrees Celsius',
+    "TMIN": 'Average daily low temperature for {month} {year} in degrees Celsius',
+    "HUMID": 'Proxy for humidity from average temperature * precipitation in mm-degrees for {month} {year}',
+    "HETSTRS": 'Proxy for heat stress from average temperature * precipitation in mm-degrees for {month} {year}',
+}
+
+
+# Titles repeat across subplot grids and animation frames, so memoize the
+# handful of distinct (inputs -> string) renderings.
+@lru_cache(maxsize=None)
 def make_NOAA_raw_title(var, year, month):
-    fmt_dict = {
-        "EMNT": 'Lowest recorded temperature for {month} {year} in degrees Celsius',
-        "PRCP": 'Total precipitation for {month} {year} in mm',
-        "TAVG": 'Average temperature for {month} {year} in degrees Celsius',
-        "EMXT": 'Highest recorded temperature for {month} {year} in degrees Celsius',
-        "TMAX": 'Average daily high temperature for {month} {year} in degrees Celsius',
-        "TMIN": 'Average daily low temperature for {month} {year} in degrees Celsius',
-        "HUMID": 'Proxy for humidity from average temperature * precipitation in mm-degrees for {month} {year}',
-        "HETSTRS": 'Proxy for heat stress from average temperature * precipitation in mm-degrees for {month} {year}',
-    }
-    return fmt_dict[var].format(year=year, month=MONTH_NAMES[month])
+    return NOAA_RAW_TITLE_FMT[var].format(year=year, month=MONTH_NAMES[month])
+
+
+NOAA_ANNUAL_TITLE_FMT = {
+    ("EMNT", 'min'): 'Lowest recorded temperature for {year} in degrees Celsius',
+    ("EMNT", 'mean'): 'Average monthly minimum temperature for {year} in degrees Celsius',
+    ("EMNT", 'max'): 'Highest monthly minimum temperature for {year} in degrees Celsius',
+    ("PRCP", 'min'): 'Total precipitation for driest month of {year} in mm',
+    ("PRCP", 'mean'): 'Average precipitation per month for {year} in mm',
+    ("PRCP", 'max'): 'Total precipitation for wettest month of {year} in mm',
+    ("TAVG", 'min'): 'Average temperature for coldest month of {year} in degrees Celsius',
+    ("TAVG", 'mean'): 'Average temperature for {year} in degrees Celsius',
+    ("TAVG", 'max'): 'Average temperature for hottest month of {year} in degrees Celsius',
+    ("EMXT", 'min'): 'Lowest monthly maximum temperature for {year} in degrees Celsius',
+    ("EMXT", 'mean'): 'Average monthly maximum temperature for {year} in degrees Celsius',
+    ("EMXT", 'max'): 'Highest recorded temperature for {year} in degrees Celsius',
+    ("TMAX", 'min'): 'Average daily high temperature for coldest month of {year} in degrees Celsius',
+    ("TMAX", 'mean'): 'Average daily high temperature for {year} in degrees Celsius',
+    ("TMAX", 'max'): 'Average daily high temperature for hottest month of {year} in degrees Celsius',
+    ("TMIN", 'min'): 'Average daily low temperature for coldest month of {year} in degrees Celsius',
+    ("TMIN", 'mean'): 'Average daily low temperature for {year} in degrees Celsius',
+    ("TMIN", 'max'): 'Average daily low temperature for hottest month of {year} in degrees Celsius',
+    ("HUMID", 'min'): 'Min Proxy for humidity from temperature * precipitation in mm-degrees for {year}',
+    ("HUMID", 'mean'): 'Average Proxy for humidity from temperature * precipitation in mm-degrees for {year}',
+    ("HUMID", 'max'): 'Max Proxy for humidity from temperature * precipitation in mm-degrees for {year}',
+    ("HETSTRS", 'min'): 'Min Proxy for heat stress from temperature * precipitation in mm-degrees for {year}',
+    ("HETSTRS", 'mean'): 'Average Proxy for heat stress from temperature * precipitation in mm-degrees for {year}',
+    ("HETSTRS", 'max'): 'Max Proxy for heat stress from temperature * precipitation in mm-degrees for {year}',
+}
 
 
+@lru_cache(maxsize=None)
 def make_NOAA_annual_title(var, year, column):
-    fmt_dict = {
-        ("EMNT", 'min'): 'Lowest recorded temperature for {year} in degrees Celsius',
-        ("EMNT", 'mean'): 'Average monthly minimum temperature for {year} in degrees Celsius',
-        ("EMNT", 'max'): 'Highest monthly minimum temperature for {year} in degrees Celsius',
-        ("PRCP", 'min'): 'Total precipitation for driest month of {year} in mm',
-        ("PRCP", 'mean'): 'Average precipitation per month for {year} in mm',
-        ("PRCP", 'max'): 'Total precipitation for wettest month of {year} in mm',
-        ("TAVG", 'min'): 'Average temperature for coldest month of {year} in degrees Celsius',
-        ("TAVG", 'mean'): 'Average temperature for {year} in degrees Celsius',
-        ("TAVG", 'max'): 'Average temperature for hottest month of {year} in degrees Celsius',
-        ("EMXT", 'min'): 'Lowest monthly maximum temperature for {year} in degrees Celsius',
-        ("EMXT", 'mean'): 'Average monthly maximum temperature for {year} in degrees Celsius',
-        ("EMXT", 'max'): 'Highest recorded temperature for {year} in degrees Celsius',
-        ("TMAX", 'min'): 'Average daily high temperature for coldest month of {year} in degrees Celsius',
-        ("TMAX", 'mean'): 'Average daily high temperature for {year} in degrees Celsius',
-        ("TMAX", 'max'): 'Average daily high temperature for hottest month of {year} in degrees Celsius',
-        ("TMIN", 'min'): 'Average daily low temperature for coldest month of {year} in degrees Celsius',
-        ("TMIN", 'mean'): 'Average daily low temperature for {year} in degrees Celsius',
-        ("TMIN", 'max'): 'Average daily low temperature for hottest month of {year} in degrees Celsius',
-        ("HUMID", 'min'): 'Min Proxy for humidity from temperature * precipitation in mm-degrees for {year}',
-        ("HUMID", 'mean'): 'Average Proxy for humidity from temperature * precipitation in mm-degrees for {year}',
-        ("HUMID", 'max'): 'Max Proxy for humidity from temperature * precipitation in mm-degrees for {year}',
-        ("HETSTRS", 'min'): 'Min Proxy for heat stress from temperature * precipitation in mm-degrees for {year}',
-        ("HETSTRS", 'mean'): 'Average Proxy for heat stress from temperature * precipitation in mm-degrees for {year}',
-        ("HETSTRS", 'max'): 'Max Proxy for heat stress from temperature * precipitation in mm-degrees for {year}',
-    }
-    return fmt_dict[(var, column)].format(year=year)
-
-
-def get_NOAA_colorscale(var):
-    '''Choose a colorscale which visually corresponds to the given variable.'''
-    if var=='PRCP':
-        # list several options but only return one
-        return ['ylgn', 'speed', 'bluyl'][2]
-    elif var=='HUMID':
-        return 'portland'
-    else:
-        return 'bluered'
+    return NOAA_ANNUAL_TITLE_FMT[(var, column)].format(year=year)
+
+
+##### trace builders #####
+
+def _NOAA_raw_trace(var, year, month):
+    '''Build the map trace for one compiled-NOAA dataset.'''
+    df = _downsample(load_compiled_NOAA(var, year, month), var)
+    # float32 halves the serialized payload, and display precision doesn't
+    # need 64-bit floats.
+    return go.Scattermap(
+        lon=df['LONGITUDE'].to_numpy(dtype='float32'),
+        lat=df['LATITUDE'].to_numpy(dtype='float32'),
+        mode='markers',
+        marker={
+            'color': df[var].to_numpy(dtype='float32'),
+            'colorscale': get_var_colorscale(var),
+            'showscale': True
+        },
+        # The marker color already carries the value; hovering renders it
+        # instead of shipping the same column twice as a text array.
+        hovertemplate='%{marker.color:.2f}<extra></extra>',
+    )
+
+
+def _NOAA_interp_trace(var, year, month):
+    '''Build the map trace for one interpolated-NOAA dataset.'''
+    df = _downsample(load_interpolated_NOAA(var, year=year, month=month), var)
+    return go.Scattermap(
+        lon=df['LONGITUDE'].to_numpy(dtype='float32'),
+        lat=df['LATITUDE'].to_numpy(dtype='float32'),
+        mode='markers',
+        marker={
+            'color': df[var].to_numpy(dtype='float32'),
+            'colorscale': get_var_colorscale(var),
+            'showscale': True
+        },
+        hovertemplate='%{marker.color:.2f}<extra></extra>',
+        opacity=0.7,
+    )
+
+
+def _NOAA_annual_trace(var, year, column):
+    '''Build the map trace for one annualized-NOAA dataset.'''
+    df = _downsample(load_annualized_NOAA(var, year=year), column)
+    return go.Scattermap(
+        lon=df['LONGITUDE'].to_numpy(dtype='float32'),
+        lat=df['LATITUDE'].to_numpy(dtype='float32'),
+        mode='markers',
+        marker={
+            'color': df[column].to_numpy(dtype='float32'),
+            'colorscale': get_var_colorscale(var),
+            'showscale': True
+        },
+        hovertemplate='%{marker.color:.2f}<extra></extra>',
+        opacity=0.7,
+    )
+
+
+def _show_map_grid(traces, titles, cols=3, to_file=None):
+    '''Combine several map traces into one figure of subplots.
+
+    A single shared figure bootstraps Plotly.js once, instead of once per
+    browser tab as the old one-figure-per-sample drivers did.
+    '''
+    rows = (len(traces) + cols - 1) // cols
+    fig = make_subplots(
+        rows=rows,
+        cols=cols,
+        specs=[[{'type': 'map'}] * cols for _ in range(rows)],
+        subplot_titles=titles,
+    )
+
+    for n, trace in enumerate(traces):
+        fig.add_trace(trace, row=n // cols + 1, col=n % cols + 1)
+
+    fig.update_maps(MAP_LAYOUT)
+    render(fig, to_file)
 
 ##### direct-output data-plot functions #####
 
-def plot_NOAA_var(var, year, month):
+def plot_NOAA_var(var, year, month, to_file=None):
     '''Plot global NOAA data for a single variable in a given month.'''
-    df = load_compiled_NOAA(var, year, month)
-    fig = go.Figure(
-        data=go.Scattergeo(
-            lon=df['LONGITUDE'],
-            lat=df['LATITUDE'],
-            text=df[var],
-            mode='markers',
-            marker_color=df[var],
-            marker={
-                'colorscale': get_NOAA_colorscale(var),
-                'showscale': True
-            },
+    render(
+        go.Figure(
+            data=_NOAA_raw_trace(var, year, month),
+            layout={
+                'title': {'text': make_NOAA_raw_title(var, year, month)},
+                'map': MAP_LAYOUT,
+            }
         ),
-        layout={
-            'title': {'text': make_NOAA_raw_title(var, year, month)}
-        }
-    ).show()
+        to_file
+    )
 
 
-def plot_NOAA_samples():
+def plot_NOAA_samples(out_dir=None):
     '''A collection of several NOAA datasets demonstrating data breadth.'''
-    plot_NOAA_var('PRCP', 1995, 10)
-    plot_NOAA_var('EMNT', 2013, 7)
-    plot_NOAA_var('TAVG', 1998, 8)
-    plot_NOAA_var('TMIN', 2001, 11)
-    plot_NOAA_var('TMAX', 1997, 9)
-    plot_NOAA_var('EMXT', 1999, 4)
-    plot_NOAA_var('PRCP', 1995, 7)
-    plot_NOAA_var('TAVG', 1995, 7)
-    plot_NOAA_var('TAVG', 2015, 7)
-
-
-def plot_interpolated(var, month, year):
+    specs = [
+        ('PRCP', 1995, 10),
+        ('EMNT', 2013, 7),
+        ('TAVG', 1998, 8),
+        ('TMIN', 2001, 11),
+        ('TMAX', 1997, 9),
+        ('EMXT', 1999, 4),
+        ('PRCP', 1995, 7),
+        ('TAVG', 1995, 7),
+        ('TAVG', 2015, 7),
+    ]
+    # pandas releases the GIL inside file reads, so the per-sample loads
+    # overlap; only the final browser handoff stays on the main thread.
+    with ThreadPoolExecutor() as executor:
+        traces = list(executor.map(lambda spec: _NOAA_raw_trace(*spec), specs))
+
+    _show_map_grid(
+        traces=traces,
+        titles=[make_NOAA_raw_title(*spec) for spec in specs],
+        to_file=join(out_dir, 'NOAA_samples.png') if out_dir else None
+    )
+
+
+def plot_interpolated(var, month, year, to_file=None):
     '''Plot interpolated NOAA data.'''
-    df = load_interpolated_NOAA(var, year=year, month=month)
-    fig = go.Figure(
-        data=go.Scattergeo(
-            lon=df['LONGITUDE'],
-            lat=df['LATITUDE'],
-            text=df[var],
-            mode='markers',
-            marker_color=df[var],
-            marker={
-                'colorscale': get_NOAA_colorscale(var),
-                'showscale': True
-            },
-            opacity=0.7,
+    render(
+        go.Figure(
+            data=_NOAA_interp_trace(var, year, month),
+            layout={
+                'title': {'text': make_NOAA_raw_title(var, year, month)},
+                'map': MAP_LAYOUT,
+            }
         ),
-        layout={
-            'title': {'text': make_NOAA_raw_title(var, year, month)},
-        }
-    ).show()
-    
+        to_file
+    )
+
 
-def plot_NOAA_interp():
-    plot_interpolated('TAVG', year=2015, month=7)
-    plot_interpolated('EMNT', year=2015, month=7)
-    plot_interpolated('EMXT', year=2015, month=7)
-    plot_interpolated('HUMID', year=2015, month=7)
-    plot_interpolated('HETSTRS', year=2015, month=7)
+def plot_NOAA_interp(out_dir=None):
+    specs = [
+        (var, 2015, 7)
+        for var in ['TAVG', 'EMNT', 'EMXT', 'HUMID', 'HETSTRS']
+    ]
+    with ThreadPoolExecutor() as executor:
+        traces = list(
+            executor.map(lambda spec: _NOAA_interp_trace(*spec), specs)
+        )
 
+    _show_map_grid(
+        traces=traces,
+        titles=[make_NOAA_raw_title(*spec) for spec in specs],
+        to_file=join(out_dir, 'NOAA_interpolated.png') if out_dir else None
+    )
 
-def plot_annualized(var, year, column):
+
+def plot_annualized(var, year, column, to_file=None):
     '''Plot annualized NOAA data.
 
     The "column" input should be "max", "min", or "mean".
     '''
-    df = load_annualized_NOAA(var, year=year)
-    fig = go.Figure(
-        data=go.Scattergeo(
-            lon=df['LONGITUDE'],
-            lat=df['LATITUDE'],
-            text=df[column],
-            mode='markers',
-            marker_color=df[column],
-            marker={
-                'colorscale': get_NOAA_colorscale(var),
-                'showscale': True
-            },
-            opacity=0.7,
+    render(
+        go.Figure(
+            data=_NOAA_annual_trace(var, year, column),
+            layout={
+                'title': {'text': make_NOAA_annual_title(var, year, column)},
+                'map': MAP_LAYOUT,
+            }
         ),
-        layout={
-            'title': {'text': make_NOAA_annual_title(var, year, column)},
-        }
-    ).show()
-    
-
-def plot_NOAA_annualized():
-    plot_annualized('TAVG', year=2015, column='min')
-    plot_annualized('EMNT', year=2015, column='mean')
-    plot_annualized('EMXT', year=2015, column='max')
-    plot_annualized('HUMID', year=2015, column='mean')
-    plot_annualized('HETSTRS', year=2015, column='max')
+        to_file
+    )
+
+
+def plot_NOAA_annualized(out_dir=None):
+    specs = [
+        ('TAVG', 2015, 'min'),
+        ('EMNT', 2015, 'mean'),
+        ('EMXT', 2015, 'max'),
+        ('HUMID', 2015, 'mean'),
+        ('HETSTRS', 2015, 'max'),
+    ]
+    with ThreadPoolExecutor() as executor:
+        traces = list(
+            executor.map(lambda spec: _NOAA_annual_trace(*spec), specs)
+        )
+
+    _show_map_grid(
+        traces=traces,
+        titles=[make_NOAA_annual_title(*spec) for spec in specs],
+        to_file=join(out_dir, 'NOAA_annualized.png') if out_dir else None
+    )
 
@@ -6,20 +6,39 @@ them programmatically requires installing an "orca" executable.
 import pandas as pd
 import plotly.graph_objects as go
 
+from functools import lru_cache
 from os.path import join
-from yaml import safe_load
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+from .._settings import get_settings
 
 ##### utility functions #####
 
+@lru_cache(maxsize=1)
 def _get_WHO_population_df():
-    processed_dir = settings['who']['country_output_dir']
-    population = pd.read_csv(join(processed_dir, 'population.csv'))
-    del population['Sex']
-    del population['Country']
-    return population
+    '''Load the columns of population.csv the plots use.
+
+    usecols keeps the parser off the dropped columns entirely, and the
+    country names land as category codes instead of repeated strings.
+    Cached because plot_WHO_samples calls this for every sub-plot;
+    callers must treat the returned frame as read-only.
+    '''
+    processed_dir = get_settings()['who']['country_output_dir']
+    return pd.read_csv(
+        join(processed_dir, 'population.csv'),
+        usecols=['CountryName', 'Year', 'Pop1'],
+        dtype={'CountryName': 'category', 'Year': 'int16'}
+    )
+
+@lru_cache(maxsize=1)
+def _get_WHO_pop_agg():
+    '''Population totals per (country, year), aggregated once.
+
+    plot_WHO_samples draws this aggregation in every sub-plot, so the
+    groupby runs a single time and later calls only filter the result.
+    '''
+    return _get_WHO_population_df().groupby(
+        ['CountryName', 'Year'], as_index=False, observed=True
+    )['Pop1'].sum()
 
 ##### direct-output data-plot functions #####
 
@@ -28,27 +47,22 @@ def _get_WHO_population_df():
 
 def plot_WHO_pop_growth(countries=None, years=None, barmode='group'):
     '''Plot total population for multiple years and countries'''
-    pop = _get_WHO_population_df()
-    df = pop.groupby(
-        ['CountryName', 'Year']
-    ).sum().reset_index()[['CountryName', 'Year', 'Pop1']]
-
-    if countries is None:
-        country_list = sorted(set(df['CountryName']))
-    else:
-        country_list = sorted(countries)
-    
+    df = _get_WHO_pop_agg()
+
+    if countries is not None:
+        df = df[df['CountryName'].isin(countries)]
+
     if years is not None:
         df = df[df['Year'].isin(years)]
-        
+
+    # One hash-partition replaces a masked scan per country; sort=True keeps
+    # the traces in the alphabetical order the per-name loop produced.
     go.Figure(
         data=[
-            go.Bar(
-                x=df[df['CountryName']==name]['Year'],
-                y=df[df['CountryName']==name]['Pop1'],
-                name=name
+            go.Bar(x=sub['Year'], y=sub['Pop1'], name=name)
+            for name, sub in df.groupby(
+                'CountryName', sort=True, observed=True
             )
-            for name in country_list
         ],
         layout={
             'title': {'text': 'Population by year and country.'},
@@ -74,17 +88,23 @@ def plot_WHO_bar(cause, year):
 
 
 def plot_WHO_death_bar(df, countries):
-    '''Plot raw death counts''' 
+    '''Plot raw death counts'''
+    # One combined mask per trace; the old chained indexing scanned the
+    # frame twice per (country, sex) pair.
+    groups = {
+        (c, s): df[(df['name'] == c) & (df['Gender'] == s)]
+        for c in ['Russian Federation', 'Ukraine']
+        for s in ['Male', 'Female']
+    }
     go.Figure(
         data=[
             go.Bar(
                 name=c + ' ' + s,
-                x=df[df['name']==c][df['Gender']==s]['Year'],
-                y=df[df['name']==c][df['Gender']==s]['Deaths1']
+                x=sub['Year'],
+                y=sub['Deaths1']
                 #color={'Male': 'blue', 'Female': 'red', 'Unknown': 'green'}[s]
             )
-            for c in ['Russian Federation', 'Ukraine']
-            for s in ['Male', 'Female']
+            for (c, s), sub in groups.items()
         ],
         layout={'title': {'text': 'Malaria deaths'}}
     ).show()
@@ -92,50 +112,71 @@ def plot_WHO_death_bar(df, countries):
 
 def plot_WHO_raw_death_bar(years):
     '''Plot death counters with ambiguous labels'''
+    # The multi-threaded pyarrow parser splits the big Morticd10 part
+    # across cores, and with only five columns kept the parsed table is
+    # narrow enough to filter in one pass instead of chunk by chunk.
     raw_mort = pd.read_csv(
-        join(settings['who']['input_dir'], 'Morticd10_part5.csv')
-    )
-    raw_mort = raw_mort[['Country', 'Year', 'List', 'Cause', 'Deaths1']]
-    names = pd.read_csv(join(settings['who']['input_dir'], 'country_codes.csv'))
-    df = pd.merge(
-        left=raw_mort,
-        left_on='Country',
-        right=names,
-        right_on='country'
+        join(get_settings()['who']['input_dir'], 'Morticd10_part5.csv'),
+        usecols=['Country', 'Year', 'List', 'Cause', 'Deaths1'],
+        engine='pyarrow'
     )
-    df = df.rename(columns={'name': 'CountryName'})
+    raw_mort = raw_mort[
+        raw_mort['Year'].isin(years) & (raw_mort['Deaths1'] > 0)
+    ]
+    names = pd.read_csv(join(get_settings()['who']['input_dir'], 'country_codes.csv'))
+    # The code table is ~200 rows, so a dict lookup per row beats a full
+    # hash-join that materializes both sides; dropna matches the old inner
+    # merge by discarding codes missing from the table.
+    code_to_name = dict(zip(names['country'], names['name']))
+    raw_mort['CountryName'] = raw_mort['Country'].map(code_to_name)
+    df = raw_mort.dropna(subset=['CountryName'])
     df = df.groupby(
         ['CountryName', 'Year', 'List', 'Cause']
     ).sum().reset_index()
-    df['CauseLabel'] = df['List'].map(str) + '-' + df['Cause'].map(str)
+    # str.cat concatenates in C; map(str) called Python str() twice per row.
+    df['CauseLabel'] = df['List'].astype(str).str.cat(
+        df['Cause'].astype(str), sep='-'
+    )
     df = df[['CountryName', 'Year', 'CauseLabel', 'Deaths1']][df['Deaths1'] > 0]
     print('There are {} causes and {} countries before merge with population data'.format(
-        len(set(df['CauseLabel'])),
-        len(set(df['CountryName']))
+        df['CauseLabel'].nunique(),
+        df['CountryName'].nunique()
     ))
     pop = pd.read_csv(
-        join(settings['who']['country_output_dir'], 'population.csv')
+        join(get_settings()['who']['country_output_dir'], 'population.csv')
     )
     pop = pop[['CountryName', 'Year', 'Pop1']][pop['Pop1'] > 0]
     pop = pop.groupby(['CountryName', 'Year']).sum()
     full = pd.merge(left=df, on=('CountryName', 'Year'), right=pop)
     full['Mortality'] = full['Deaths1']/full['Pop1']
-    full['TextMort'] = full['Deaths1'].map(str) + ' in ' + full['Pop1'].map(str)
-    full = full[['CountryName', 'Year', 'Mortality', 'CauseLabel', 'TextMort']][full['Year'].isin(years)]
+    full['TextMort'] = full['Deaths1'].astype(str).str.cat(
+        full['Pop1'].astype(str), sep=' in '
+    )
+    # The year filter already happened on read.
+    full = full[['CountryName', 'Year', 'Mortality', 'CauseLabel', 'TextMort']]
     print('There are {} causes and {} countries after merge with population data'.format(
-        len(set(full['CauseLabel'])),
-        len(set(full['CountryName']))
+        full['CauseLabel'].nunique(),
+        full['CountryName'].nunique()
     ))
+    # TODO: limit is arbitrary; find a better limit
+    # cat.categories arrives deduplicated and sorted from C code, so no
+    # Python-level set or sort runs over the labels.
+    full['CauseLabel'] = full['CauseLabel'].astype('category')
+    top_labels = full['CauseLabel'].cat.categories[:40]
+    # One hash-partition of the frame replaces the O(labels * countries)
+    # chained-mask scans; sorted groupby keys keep the old trace order.
+    grouped = full[full['CauseLabel'].isin(top_labels)].groupby(
+        ['CauseLabel', 'CountryName']
+    )
     go.Figure(
         data=[
             go.Bar(
-                name='Mortality due to {}'.format(l, c),
-                x=full[full['CauseLabel']==l][full['CountryName']==c]['Year'],
-                y=full[full['CauseLabel']==l][full['CountryName']==c]['Mortality'],
-                text=full[full['CauseLabel']==l][full['CountryName']==c]['TextMort']
+                name='Mortality due to {}'.format(label),
+                x=sub['Year'],
+                y=sub['Mortality'],
+                text=sub['TextMort']
             )
-            for l in sorted(set(full['CauseLabel']))[:40] # TODO: limit is arbitrary; find a better limit
-            for c in sorted(set(full['CountryName']))
+            for (label, country), sub in grouped
         ],
         layout={
             'title': {'text': 'Mortality in Ukraine for various causes'},
@@ -147,7 +188,7 @@ def plot_WHO_raw_death_bar(years):
 
 def plot_WHO_mortality_bar(years):
     mort = pd.read_csv(
-        join(settings['who']['country_output_dir'], 'Cyprus_mortality.csv')
+        join(get_settings()['who']['country_output_dir'], 'Cyprus_mortality.csv')
     )
     mort = mort[mort['DeathsAll']>0][mort['Year'].isin(years)]
     go.Figure(
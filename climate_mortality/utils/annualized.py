@@ -8,83 +8,91 @@ extremes.
 '''
 import pandas as pd
 
-from numpy import mean
+from concurrent.futures import ProcessPoolExecutor
 from os.path import join
-from scipy.interpolate import interp2d
 from sys import stdout
-from yaml import safe_load
 
+from .._settings import get_settings
 from .interpolation import INTERPOLATION_COLUMNS, load_interpolated_NOAA
-
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+from .noaa_reader import read_cached_csv
 
 
 def load_annualized_NOAA(var, year):
-    '''Load NOAA data for a single variable in a given year.'''
-    return pd.read_csv(
-        join(settings['noaa']['annualized_dir'], f'{var}{year}.csv')
+    '''Load NOAA data for a single variable in a given year.
+
+    Prefers a Parquet file when one exists; falls back to CSV for data
+    annualized before the Parquet switch.
+    '''
+    return read_cached_csv(
+        join(get_settings()['noaa']['annualized_dir'], f'{var}{year}.csv')
     )
 
 
 def annualize_NOAA(var, year):
-    '''Create 2D annualized map across available per-month interpolations.'''
-    # Make a list of all the columns we will use.
-    columns = [
-        f'{var}_{month}'
-        for month in range(1, 13)
-    ]
+    '''Create 2D annualized map across available per-month interpolations.
 
-    # Compile & join all interpolations
-    base = load_interpolated_NOAA(
-        var=var,
-        year=year,
-        month=1
-    ).rename(columns={var: f'{var}_1'})
-    
-    for month in range(2, 13):
-        additional = load_interpolated_NOAA(
+    Every monthly interpolation comes off the same lon/lat grid, so the
+    twelve value columns are aligned once on that grid and stacked into a
+    single (N, 12) array, replacing the old chain of eleven pairwise hash
+    joins. The inner join keeps only cells covered in all twelve months,
+    matching the old merge behavior when station coverage varies.
+    '''
+    monthly = [
+        load_interpolated_NOAA(
             var=var,
             year=year,
             month=month
-        ).rename(columns={var: f'{var}_{month}'})
-        base = pd.merge(
-            left=base,
-            right=additional,
-            on=['LONGITUDE', 'LATITUDE'],
-        )
+        ).set_index(['LONGITUDE', 'LATITUDE'])[var]
+        for month in range(1, 13)
+    ]
+    combined = pd.concat(monthly, axis=1, join='inner')
 
-    base['min'] = base[columns].apply(min, axis=1)
-    base['max'] = base[columns].apply(max, axis=1)
-    base['mean'] = base[columns].apply(mean, axis=1)
+    # One contiguous ndarray and three C-level reductions replace the
+    # per-row Python calls apply(axis=1) makes.
+    monthly_values = combined.to_numpy()
+    base = combined.index.to_frame(index=False)
+    base['min'] = monthly_values.min(axis=1)
+    base['max'] = monthly_values.max(axis=1)
+    base['mean'] = monthly_values.mean(axis=1)
+    return base
 
-    # Remove the component columns after annualization
-    for col in columns:
-        del base[col]
 
-    return base
+def _annualize_one(var, year):
+    '''Annualize and store one variable-year combination.
+
+    Module-level (rather than nested in annualize_all_NOAA) so it pickles
+    cleanly into worker processes.
+    '''
+    print(f'## Annualizing for {var}{year}')
+    stdout.flush()
+    try:
+        annualized = annualize_NOAA(var, year)
+    except FileNotFoundError as exc:
+        print(f'Missing data for {var}{year}: {exc}')
+    else:
+        annualized.to_parquet(
+            join(
+                get_settings()['noaa']['annualized_dir'],
+                f'{var}{year}.parquet'
+            ),
+            compression='zstd',
+            index=False
+        )
 
 
 def annualize_all_NOAA():
     '''Loop over NOAA data, doing annualization stage of processing.
 
     Loop over all variables and years to annualiz and store all NOAA
-    data.
+    data. Each variable-year only touches its own twelve monthly files,
+    so the combinations run in parallel worker processes.
     '''
-    for var in INTERPOLATION_COLUMNS:
-        print(f'------ Annualizing for {var}')
-        for year in range(1995, 2022):
-            print(f'## Annualizing for {var}{year}')
-            stdout.flush()
-            try:
-                annualized = annualize_NOAA(var, year)
-            except FileNotFoundError as exc:
-                print(f'Missing data for {var}{year}: {exc}')
-            else:
-                annualized.to_csv(
-                    join(
-                        settings['noaa']['annualized_dir'],
-                        f'{var}{year}.csv'
-                    ),
-                    index=False
-                )
+    with ProcessPoolExecutor() as executor:
+        futures = [
+            executor.submit(_annualize_one, var, year)
+            for var in INTERPOLATION_COLUMNS
+            for year in range(1995, 2022)
+        ]
+        # Surface any worker exception instead of failing silently.
+        for future in futures:
+            future.result()
@@ -6,16 +6,21 @@ CCAFS-CMIP5 group climate projections
 Output format is CSV, and can be filtered during read.
 '''
 
+import pandas as pd
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from math import ceil, floor
 
+from numpy import arange, fromstring
 from os import listdir, mkdir
 from os.path import isdir, join
 
 from string import whitespace
 from sys import stdout
-from yaml import safe_load
+
+from .._settings import get_settings
 
 # Lower-level / independent functions are near the top.
 # Functions which depend on them are further down.
@@ -48,10 +53,6 @@ SCALE_LOOKUP = {
 }
 
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
-
-
 # Functions with only external dependencies
 
 def read_token(fp):
@@ -90,17 +91,50 @@ def skip_this_pos(xpos, ypos, xmin=-180, xmax=180, ymin=-90, ymax=90):
 
 # Functions with internal dependencies
 
+# Realistic (min, max) value ranges per dimension.
+BOUNDS = {
+    'Celsius': (-95.0, 65.0),
+    'mm': (0.0, 30000.0),
+}
+
+
 def check_bounds(value, dimension='Celsius'):
     '''Determines whether the given value is unrealistic for is dimension.'''
-    if dimension == 'Celsius':
-        if -95.0 <= value <= 65.0:
-            return True
-    elif dimension == 'mm':
-        if 0.0 <= value <= 30000:
-            return True
+    bounds = BOUNDS.get(dimension)
+
+    if bounds is not None and bounds[0] <= value <= bounds[1]:
+        return True
     raise DataOutOfBoundsError(f'Found unrealistic value {value} for dimension {dimension}.')
+
+
+def check_bounds_array(values, dimension='Celsius'):
+    '''Vectorized check_bounds over a whole array of values.
+
+    The array extremes bound every element, so two scalar comparisons
+    validate the full array; empty arrays are trivially in bounds.
+    '''
+    if values.size:
+        check_bounds(values.min(), dimension=dimension)
+        check_bounds(values.max(), dimension=dimension)
+    return True
     
 
+@lru_cache(maxsize=8)
+def _grid_positions(ncols, nrows, xllcorner, yllcorner, cellsize):
+    '''Build the flattened index and position arrays for one grid layout.
+
+    Every ASC file in a CCAFS-CMIP5 directory shares the same header, so
+    the coordinate grid is identical across files; caching it by layout
+    means only the first file of a batch pays for its construction.
+    '''
+    ndx = arange(ncols * nrows)
+    xn = ndx % ncols
+    yn = ndx // ncols
+    xpos = xllcorner + xn * cellsize
+    ypos = yllcorner + (nrows - yn) * cellsize
+    return xn, yn, xpos, ypos
+
+
 def asc_to_array(
     filepath,
     xskip=0,
@@ -112,60 +146,57 @@ def asc_to_array(
     dimension='Celsius',
     scale=1.0
 ):
-    '''This function downsamples a GIS ASCII file into a Python array of tuples.
+    '''This function downsamples a GIS ASCII file into parallel numpy arrays.
 
     Inputs:
         filepath    path of the ASCII file source.
         xskip=0     number of x columns to skip between retained values
         yskip=0     number of y rows to skip between retained values
 
+    Returns a (longitude, latitude, value) tuple of equal-length numpy
+    arrays, ready to feed into a DataFrame or file writer without building
+    a Python tuple per grid cell.
+
     Note that \n characters in the target file are *NOT* guaranteed to be at the
     logical line ends.  The total number of items in the file is fixed, though,
-    so we specifically track the logical row & column.
+    so the logical row & column of each value come from its index in the flat
+    parsed array rather than from line structure.
 
     Compare
     http://surferhelp.goldensoftware.com/subsys/subsys_ASC_Arc_Info_ASCII_Grid.htm
     https://desktop.arcgis.com/en/arcmap/latest/manage-data/raster-and-images/esri-ascii-raster-format.htm
     '''
-    data_array = []
-    
     with open(filepath, 'r') as asc:
         fmt = ASCIIFormat(asc)
-        xn = 0
-        yn = 0
-        item_str = read_token(asc)
-        total = 0
-        
-        while item_str:
-            total += 1
-
-            if item_str != fmt.null:
-                xpos = fmt.xllcorner + xn * fmt.cellsize
-                ypos = fmt.yllcorner + (fmt.nrows - yn) * fmt.cellsize
-                
-                if not (skip_this_ndx(xn, yn, xskip, yskip) or skip_this_pos(xpos, ypos, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax)):
-                    val = float(item_str) * scale
-                    check_bounds(val, dimension=dimension)
-                    data_array.append((xpos, ypos, val))
-
-                    if len(data_array) % 4000 == 0:
-                        print(
-                            'Reading {} in progress.  {} non-null values read so far.'.format(
-                                filepath,
-                                len(data_array)
-                            )
-                        )
-                        sys.stdout.flush()
-
-            xn += 1
-            item_str = read_token(asc)
-            
-            if xn == fmt.ncols:
-                xn = 0
-                yn += 1
-
-    print('Read {} total, and {} non-null values.'.format(total, len(data_array)))
-    return data_array
+        # One bulk read + C-level parse of the whole data block replaces the
+        # old per-character tokenizer, which made two Python-level calls per
+        # byte of the file. float32 is plenty for 0.1-degree / 1mm source
+        # precision and halves the parsed array.
+        values = fromstring(asc.read(), dtype='float32', sep=' ')
+
+    total = values.size
+    xn, yn, xpos, ypos = _grid_positions(
+        fmt.ncols,
+        fmt.nrows,
+        fmt.xllcorner,
+        fmt.yllcorner,
+        fmt.cellsize
+    )
+
+    # Same filters as before, applied as boolean masks over the whole grid:
+    # drop nulls, downsample by index, and clip to the position window.
+    keep = (
+        (values != float(fmt.null))
+        & (xn % (xskip + 1) == 0)
+        & (yn % (yskip + 1) == 0)
+        & (xpos >= xmin) & (xpos <= xmax)
+        & (ypos >= ymin) & (ypos <= ymax)
+    )
+    vals = values[keep] * scale
+    check_bounds_array(vals, dimension=dimension)
+
+    print('Read {} total, and {} non-null values.'.format(total, vals.size))
+    return xpos[keep], ypos[keep], vals
 
 
 def asc_to_filtered_csv(
@@ -194,7 +225,7 @@ def asc_to_filtered_csv(
     '''
 
     try:
-        arr = asc_to_array(
+        lon, lat, vals = asc_to_array(
             infile,
             xskip=xskip,
             yskip=yskip,
@@ -207,11 +238,14 @@ def asc_to_filtered_csv(
         )
     except DataOutOfBoundsError as exc:
         print(f'Skipping output from {infile}: {exc}')
-    else: 
-        with open(outfile, 'w') as outf:
-            outf.write('LONGITUDE,LATITUDE,{}\n'.format(label))
-            for ln in arr:
-                outf.write('{}, {}, {}\n'.format(ln[0], ln[1], ln[2]))
+    else:
+        # pandas formats the whole table through its C serializer in one
+        # call, instead of formatting each row at the Python level.
+        pd.DataFrame({
+            'LONGITUDE': lon,
+            'LATITUDE': lat,
+            label: vals,
+        }).to_csv(outfile, index=False)
 
 
 def filter_asc_dir(
@@ -239,6 +273,21 @@ def filter_asc_dir(
         ymax=90     maximum y position
     '''
     
+    _run_asc_jobs(
+        _collect_asc_jobs(source_dir, dest_dir, label=label),
+        xskip=xskip,
+        yskip=yskip,
+        xmin=xmin,
+        xmax=xmax,
+        ymin=ymin,
+        ymax=ymax
+    )
+
+
+def _collect_asc_jobs(source_dir, dest_dir, label=None):
+    '''List the (source, destination, label) conversions for one directory.'''
+    jobs = []
+
     for fname in listdir(source_dir):
         if fname.endswith('.asc'):
             source_fn = join(source_dir, fname)
@@ -246,14 +295,28 @@ def filter_asc_dir(
             name_parts[-1] = 'csv'
             dest_name = '.'.join(name_parts)
             dest_fn = join(dest_dir, dest_name)
-            
+
             if label is None:
                 this_label = FILE2VAR[name_parts[0].split('_')[0]]
             else:
                 this_label = label
-    
+
             print(f'Processing {source_fn} -> {dest_fn} for {this_label}')
-            asc_to_filtered_csv(
+            jobs.append((source_fn, dest_fn, this_label))
+
+    return jobs
+
+
+def _run_asc_jobs(jobs, xskip, yskip, xmin, xmax, ymin, ymax):
+    '''Convert the collected files in parallel worker processes.'''
+    stdout.flush()
+
+    # Each file converts independently, so the whole batch fans out across
+    # worker processes instead of converting one file at a time.
+    with ProcessPoolExecutor() as executor:
+        futures = [
+            executor.submit(
+                asc_to_filtered_csv,
                 source_fn,
                 dest_fn,
                 xskip=xskip,
@@ -264,12 +327,20 @@ def filter_asc_dir(
                 ymin=ymin,
                 ymax=ymax
             )
-            stdout.flush()
+            for source_fn, dest_fn, this_label in jobs
+        ]
+        # Surface any worker exception instead of failing silently.
+        for future in futures:
+            future.result()
 
 def filter_tree(skip=0):
-    source_dir = settings['cmip5']['input_dir']
-    dest_dir = settings['cmip5']['output_dir']
-    
+    source_dir = get_settings()['cmip5']['input_dir']
+    dest_dir = get_settings()['cmip5']['output_dir']
+    jobs = []
+
+    # Collect every file across every directory first, so one process pool
+    # stays saturated through small directories instead of draining and
+    # refilling per directory.
     for datadir in listdir(source_dir):
         in_dir = join(source_dir, datadir)
         if isdir(in_dir):
@@ -280,16 +351,17 @@ def filter_tree(skip=0):
             except FileExistsError:
                 pass # Just need to make sure it's here; don't need to empty it.
 
-            filter_asc_dir(
-                in_dir,
-                out_dir,
-                xskip=skip,
-                yskip=skip,
-                xmin=-125,
-                xmax=-65,
-                ymin=24,
-                ymax=50
-            )
+            jobs.extend(_collect_asc_jobs(in_dir, out_dir))
+
+    _run_asc_jobs(
+        jobs,
+        xskip=skip,
+        yskip=skip,
+        xmin=-125,
+        xmax=-65,
+        ymin=24,
+        ymax=50
+    )
 
 # Classes
 
@@ -308,26 +380,27 @@ class ASCIIFormat(object):
         header block.
         '''
         fp.seek(0)
-        self.ncols = self._read_header_val(fp, 'ncols', int)
-        self.nrows = self._read_header_val(fp, 'nrows', int)
-        self.xllcorner = self._read_header_val(fp, 'xllcorner', float)
-        self.yllcorner = self._read_header_val(fp, 'yllcorner', float)
-        self.cellsize = self._read_header_val(fp, 'cellsize', float)
-        self.null = self._read_header_val(fp, 'NODATA_value', str)
-
-    def _read_header_val(self, fp, prefix, fmt):
-        '''Read a one-line header string and return the corresponding value.'''
-        ln = fp.readline()
-
-        if not ln:
-            raise ValueError('Missing expected header data {}.'.format(prefix))
-
-        label, value = ln.split()
-
-        if label.lower() != prefix.lower():
-            raise ValueError(
-                'Found label {} when expecting label {}'.format(label, prefix)
-            )
-        
-        return fmt(value)
+        header = {}
+
+        # Read the six-line header in one pass into a label -> value dict,
+        # then assign the typed fields; this also stops caring about the
+        # order the labels appear in.
+        for _ in range(6):
+            ln = fp.readline()
+
+            if not ln:
+                raise ValueError('Missing expected header data.')
+
+            label, value = ln.split()
+            header[label.lower()] = value
+
+        try:
+            self.ncols = int(header['ncols'])
+            self.nrows = int(header['nrows'])
+            self.xllcorner = float(header['xllcorner'])
+            self.yllcorner = float(header['yllcorner'])
+            self.cellsize = float(header['cellsize'])
+            self.null = header['nodata_value']
+        except KeyError as exc:
+            raise ValueError(f'Missing expected header data {exc}.')
 
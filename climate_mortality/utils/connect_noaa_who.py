@@ -1,17 +1,17 @@
 '''Calculations connecting the WHO and NOAA data.'''
 import pandas as pd
 
-from numpy import array
+from functools import lru_cache
+from numpy import array, asarray, inf
 from os.path import join
+from scipy.spatial import cKDTree
 from shapefile import Reader
 from sys import stdout
-from yaml import safe_load
 
+from .._settings import get_settings
 from .annualized import load_annualized_NOAA
 from .who_reader import load_WHO_mortality
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
 
 MODEL_CLIMATE_VARS = [
     # Omit EMNT and EMXT since those have no counterpart in predicted climates.
@@ -27,7 +27,7 @@ MODEL_CLIMATE_VARS = [
 def load_country_climate_df():
     '''Load a previously-calculated dataframe for per-country-year climates.'''
     return pd.read_csv(
-        join(settings['combined'], 'country_center_climates.csv')
+        join(get_settings()['combined'], 'country_center_climates.csv')
     )
 
 
@@ -43,10 +43,23 @@ def _get_center_of_shp(shape):
 
     TODO: Do some respectable geometry instead.
     '''
-    l = float(len(shape.points))
-    x = sum([p[0] for p in shape.points])
-    y = sum([p[1] for p in shape.points])
-    return (x/l, y/l)
+    x, y = asarray(shape.points).mean(axis=0)
+    return (x, y)
+
+
+@lru_cache(maxsize=1)
+def _get_country_shapes():
+    '''Read the country shapefile once, as parallel (names, shapes) lists.
+
+    The shapefile is invariant for the life of the process, and each
+    reader.records() / reader.shapes() call re-parses the file, so every
+    consumer shares this one materialized read. Callers must treat the
+    result as read-only.
+    '''
+    reader = Reader(get_settings()['country_shapes'])
+    names = [record.NAME for record in reader.records()]
+    shapes = list(reader.shapes())
+    return names, shapes
 
 
 def _get_country_centers():
@@ -59,49 +72,68 @@ def _get_country_centers():
     TODO: Use actual geometry to get a better estimate of the centers, or
     replace this function entirely.
     '''
-    source_path = settings['country_shapes']
-    reader = Reader(source_path)
-    available_country_shapes = [record.NAME for record in reader.records()]
-    centers = [_get_center_of_shp(shape) for shape in reader.shapes()]
-    records = reader.records()
-    center_dict = {
-        records[n].NAME: centers[n]
-        for n in range(len(records))
-    }
+    names, shapes = _get_country_shapes()
+    # Columnar construction keeps the dtypes stable; a list of per-country
+    # dicts makes pandas re-infer them row by row.
+    centers = asarray([_get_center_of_shp(shape) for shape in shapes])
     return (
-        pd.DataFrame.from_dict([
-            {'country': name, 'LONGITUDE': pos[0], 'LATITUDE': pos[1]}
-            for name, pos in center_dict.items()
-        ]),
+        pd.DataFrame({
+            'country': names,
+            'LONGITUDE': centers[:, 0],
+            'LATITUDE': centers[:, 1]
+        }),
         centers
     )
 
 
-def _spatial_climate_average(raw_df, points):
+def _spatial_climate_average(raw_df, points, tree=None):
     '''Spatially average gridded-map dataframe of annualized data.
 
     Returns a dictionary with the mean of each column. Resolution of the grid
     used in the spatial average matches that of the input raw_df.
+
+    <tree> is an optional cKDTree over raw_df's (LONGITUDE, LATITUDE)
+    columns. When given, the bounding box is answered by a range query on
+    the tree instead of four full-column comparisons, so only the rows
+    near this country are ever touched.
     '''
-    min_long = min(p[0] for p in points) - 1
-    max_long = max(p[0] for p in points) + 1
-    min_lat = min(p[1] for p in points) - 1
-    max_lat = max(p[1] for p in points) + 1
-    return raw_df[
-        (min_long <= raw_df['LONGITUDE']) & (raw_df['LONGITUDE'] <= max_long) & (min_lat <= raw_df['LATITUDE']) & (raw_df['LATITUDE'] <= max_lat)
-    ].mean().to_dict()
+    pts = asarray(points)
+    min_long, min_lat = pts.min(axis=0) - 1
+    max_long, max_lat = pts.max(axis=0) + 1
+
+    if tree is None:
+        subset = raw_df[
+            (min_long <= raw_df['LONGITUDE']) & (raw_df['LONGITUDE'] <= max_long) & (min_lat <= raw_df['LATITUDE']) & (raw_df['LATITUDE'] <= max_lat)
+        ]
+    else:
+        # A Chebyshev ball around the box center is the smallest square
+        # covering the box; trim the corners back to the exact box with a
+        # mask over just the candidate rows.
+        center = ((min_long + max_long) / 2, (min_lat + max_lat) / 2)
+        radius = max(max_long - min_long, max_lat - min_lat) / 2
+        subset = raw_df.iloc[tree.query_ball_point(center, r=radius, p=inf)]
+        subset = subset[
+            (min_long <= subset['LONGITUDE']) & (subset['LONGITUDE'] <= max_long) & (min_lat <= subset['LATITUDE']) & (subset['LATITUDE'] <= max_lat)
+        ]
+
+    return subset.mean().to_dict()
 
 
 def _load_country_climate(var, year):
     '''Load country-labelled climate data for a particular variable and year.'''
     print(f'Averaging per-country climates for {var} in {year}')
-    source_path = settings['country_shapes']
-    reader = Reader(source_path)
-    names = [record.NAME for record in reader.records()]
+    names, shapes = _get_country_shapes()
     annualized_var = load_annualized_NOAA(var, year)
+    # One tree build per (var, year) replaces ~250 full scans of the grid,
+    # one per country.
+    tree = cKDTree(annualized_var[['LONGITUDE', 'LATITUDE']].to_numpy())
     climates = [
-        _spatial_climate_average(raw_df=annualized_var, points=shape.points)
-        for shape in reader.shapes()
+        _spatial_climate_average(
+            raw_df=annualized_var,
+            points=shape.points,
+            tree=tree
+        )
+        for shape in shapes
     ]
     return pd.DataFrame.from_dict([
         {
@@ -118,16 +150,17 @@ def _load_climate_year(year):
     '''Load all annualized climate data for one year'''
     print(f'Averaging all climate variables in {year}.')
     stdout.flush()
-    interp_vars = sorted(MODEL_CLIMATE_VARS)
-    base = _load_country_climate(interp_vars[0], year)
-    
-    for var in interp_vars[1:]: # 0th var already loaded
-        base = pd.merge(
-            left=base,
-            on='country',
-            right=_load_country_climate(var, year)
-        )
-        
+    # Every per-variable frame has one row per country from the same
+    # shapefile, so one indexed concat aligns all six at once instead of
+    # five pairwise hash joins re-hashing the country key each time.
+    base = pd.concat(
+        [
+            _load_country_climate(var, year).set_index('country')
+            for var in sorted(MODEL_CLIMATE_VARS)
+        ],
+        axis=1,
+        join='inner'
+    ).reset_index()
     base['Year'] = year
     return base
 
@@ -139,6 +172,6 @@ def build_composite_climate_df():
       for year in range(1995, 2021)
     ])
     country_climate.to_csv(
-        join(settings['combined'], 'country_center_climates.csv'),
+        join(get_settings()['combined'], 'country_center_climates.csv'),
         index=False
     )
@@ -7,164 +7,295 @@ climates, such as near the top and foot of high mountains.
 '''
 import pandas as pd
 
-from numpy import array, nan
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from numpy import (
+    arange,
+    array,
+    ascontiguousarray,
+    frombuffer,
+    maximum,
+    meshgrid,
+    nan,
+    stack
+)
 from os.path import join
-from scipy.interpolate import griddata
+from scipy.interpolate import (
+    CloughTocher2DInterpolator,
+    LinearNDInterpolator,
+    NearestNDInterpolator
+)
+from scipy.spatial import Delaunay, cKDTree
 from sys import stdout
-from yaml import safe_load
 
-from .noaa_reader import DATA_COLUMNS, load_compiled_NOAA
+from .._settings import get_settings
+from .noaa_reader import (
+    DATA_COLUMNS,
+    GRID_POSITION_DTYPES,
+    load_compiled_NOAA,
+    read_cached_csv
+)
 
 
 INTERPOLATION_COLUMNS = DATA_COLUMNS.union({'HUMID', 'HETSTRS'})
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
-
 
 def load_interpolated_NOAA(var, year, month):
-    '''Load NOAA data for a single variable in a given month.'''
-    return pd.read_csv(
-        join(settings['noaa']['interpolated_dir'], f'{var}{year}-{month}.csv')
+    '''Load NOAA data for a single variable in a given month.
+
+    Prefers a Parquet file when one exists; falls back to CSV for data
+    interpolated before the Parquet switch.
+    '''
+    return read_cached_csv(
+        join(
+            get_settings()['noaa']['interpolated_dir'],
+            f'{var}{year}-{month}.csv'
+        ),
+        columns=['LONGITUDE', 'LATITUDE', var],
+        dtype={**GRID_POSITION_DTYPES, var: 'float32'}
+    )
+
+
+@lru_cache(maxsize=4)
+def _xi_grid(step):
+    '''Return the cached (N, 2) evaluation grid for one spacing.
+
+    Every variable-month is evaluated on the same grid, so build it once
+    per spacing instead of re-allocating 64,800 positions per call.
+    float32 positions are exact for these grid spacings and halve the
+    memory traffic through the interpolator. Callers must treat the
+    result as read-only.
+    '''
+    lon, lat = meshgrid(
+        arange(-180, 180, step, dtype='float32'),
+        arange(-90, 90, step, dtype='float32'),
+        indexing='ij'
+    )
+    return stack([lon.ravel(), lat.ravel()], axis=-1)
+
+
+class _IDWInterpolator:
+    '''Inverse-distance-weighted interpolator over scattered observations.
+
+    Weights the <k> nearest stations by 1/distance**<power>. Unlike the
+    triangulation-backed kinds this needs only a KD-tree, so construction
+    is cheap and evaluation is a single batched tree query plus array
+    arithmetic; it also extrapolates outside the stations' convex hull
+    instead of returning NaN there.
+    '''
+
+    def __init__(self, points, values, k=8, power=2):
+        self._tree = cKDTree(points)
+        self._values = values
+        self._k = k
+        self._power = power
+
+    def __call__(self, xi):
+        dist, idx = self._tree.query(xi, k=self._k)
+        # An exact station hit gives zero distance; the floor keeps the
+        # weight finite and large enough to dominate the other neighbors.
+        weights = 1.0 / maximum(dist, 1e-12) ** self._power
+        return (self._values[idx] * weights).sum(axis=1) / weights.sum(axis=1)
+
+
+_INTERPOLATOR_CLASSES = {
+    'nearest': NearestNDInterpolator,
+    'linear': LinearNDInterpolator,
+    'cubic': CloughTocher2DInterpolator,
+}
+
+
+@lru_cache(maxsize=32)
+def _triangulate(points_bytes, n_points):
+    '''Triangulate a point set passed as its raw coordinate buffer.
+
+    Keyed on the buffer contents rather than on (var, year, month):
+    station sets drift slowly, so consecutive months or co-located
+    variables with an unchanged point set share one triangulation
+    instead of rebuilding it.
+    '''
+    return Delaunay(
+        frombuffer(points_bytes, dtype='float32').reshape(n_points, 2)
     )
 
 
+@lru_cache(maxsize=32)
+def _get_NOAA_triangulation(var, year, month):
+    '''Load one month's observations and triangulate their positions.
+
+    The Delaunay triangulation dominates interpolator construction, so it
+    is cached separately from the interpolators: the 'linear' and 'cubic'
+    interpolators for the same observations reuse one triangulation.
+    '''
+    source_df = load_compiled_NOAA(var=var, month=month, year=year)
+    points = ascontiguousarray(source_df[['LONGITUDE', 'LATITUDE']].to_numpy())
+    values = source_df[var].to_numpy()
+    return _triangulate(points.tobytes(), len(points)), values
+
+
+@lru_cache(maxsize=32)
+def _get_NOAA_interpolator(var, year, month, kind):
+    '''Build and cache an interpolator over one month's observations.
+
+    griddata() triangulates the scattered observations on every call, which
+    is the expensive part. Constructing the equivalent interpolator object
+    once means repeat evaluations (HUMID and HETSTRS both reuse TAVG and
+    PRCP) only pay for point lookups. The cache is bounded because each
+    entry holds a full Delaunay triangulation.
+    '''
+    tri, values = _get_NOAA_triangulation(var, year, month)
+    if kind == 'nearest':
+        # NearestNDInterpolator works off a KD-tree, not the triangulation.
+        return NearestNDInterpolator(tri.points, values)
+    elif kind == 'idw':
+        return _IDWInterpolator(tri.points, values)
+    return _INTERPOLATOR_CLASSES[kind](tri, values)
+
+
 def interpolation_NOAA_points(var, year, month, kind, xi):
     '''Return DataFrame interpolating NOAA data onto the array <xi>.'''
     if var == 'HUMID':
         return _interpolate_HUMID_points(year, month, kind, xi)
     elif var == 'HETSTRS':
         return _interpolate_HETSTRS_points(year, month, kind, xi)
-    
-    source_df = load_compiled_NOAA(var=var, month=month, year=year).to_dict('records')
-    points = array([
-        [record['LONGITUDE'], record['LATITUDE']]
-        for record in source_df
-    ])
-    values = array([
-        record[var]
-        for record in source_df
-    ])
-    interpolated = griddata(
-        points,
-        values,
-        xi,
-        method=kind,
-    )
-    return pd.DataFrame.from_dict([
-        {'LONGITUDE': xi[n][0], 'LATITUDE': xi[n][1], var: interpolated[n]}
-        for n in range(len(xi))
-    ]).dropna()
+
+    interpolated = _get_NOAA_interpolator(var, year, month, kind)(xi)
+    # Build the output straight from the three column arrays; going through
+    # a list of per-point dicts allocated ~200k throwaway Python objects.
+    return pd.DataFrame({
+        'LONGITUDE': xi[:, 0],
+        'LATITUDE': xi[:, 1],
+        var: interpolated,
+    }).dropna()
     
 
 def _interpolate_HUMID_points(year, month, kind, xi):
-    '''Generate a HUMIDITY proxy in mm-degrees Celsius.'''
-    tavg_df = interpolate_NOAA_map(
-        var='TAVG',
-        year=year,
-        month=month,
-        kind=kind,
-        xi=xi
-    )
-    prcp_df = interpolate_NOAA_map(
-        var='PRCP',
-        year=year,
-        month=month,
-        kind=kind,
-        xi=xi
-    )
-    humid_df = tavg_df.merge(prcp_df, on=['LONGITUDE', 'LATITUDE'])
-    humid_df['humid_t'] = humid_df['TAVG']+273.15
-    humid_df['HUMID'] = humid_df['PRCP']*humid_df['humid_t']
-    del humid_df['humid_t']
-    return humid_df
-    
+    '''Generate a HUMIDITY proxy in mm-degrees Celsius.
+
+    TAVG and PRCP are both evaluated on the shared <xi> grid, so their
+    results already line up row-for-row and combine with plain array
+    arithmetic; no positional merge is needed. dropna() keeps only cells
+    covered by both interpolations, as the old inner merge did.
+    '''
+    tavg = _get_NOAA_interpolator('TAVG', year, month, kind)(xi)
+    prcp = _get_NOAA_interpolator('PRCP', year, month, kind)(xi)
+    return pd.DataFrame({
+        'LONGITUDE': xi[:, 0],
+        'LATITUDE': xi[:, 1],
+        'HUMID': prcp * (tavg + 273.15),
+    }).dropna()
+
 
 def _interpolate_HETSTRS_points(year, month, kind, xi):
-    '''Generate a HUMIDITY proxy in mm-degrees Celsius.'''
-    tavg_df = interpolate_NOAA_map(
-        var='TAVG',
-        year=year,
-        month=month,
-        kind=kind,
-        xi=xi
-    )
-    prcp_df = interpolate_NOAA_map(
-        var='PRCP',
-        year=year,
-        month=month,
-        kind=kind,
-        xi=xi
-    )
-    hetstrs_df = tavg_df.merge(prcp_df, on=['LONGITUDE', 'LATITUDE'])
-    # Not much difference if we use TAVG or Kelvin as proxy for humidity.
-    #humid_df['Kelvin'] = humid_df['TAVG']+273.15
-    #humid_df['HUMID'] = humid_df['PRCP']*humid_df['Kelvin']
-    # humid_df['HUMID'] = humid_df['PRCP']*humid_df['TAVG']
-    # Actual important variable is human heat stress - may want to subtract a
-    # temperature like 20 Celsius since that's approx optimal human environment
-    # temperature.
-    hetstrs_df['stress_t'] = humid_df['TAVG']-20
-    hetstrs_df['HETSTRS'] = humid_df['PRCP']*humid_df['stress_t']
-    del hetstrs_df['stress_t']
-    return hetstrs_df
-
-
-def interpolate_NOAA_map(var, year, month, kind):
+    '''Generate a heat-stress proxy in mm-degrees Celsius.
+
+    Same shared-grid arithmetic as _interpolate_HUMID_points. Not much
+    difference if we use TAVG or Kelvin as proxy for humidity; the actual
+    important variable is human heat stress, so subtract 20 Celsius since
+    that's approx optimal human environment temperature.
+    '''
+    tavg = _get_NOAA_interpolator('TAVG', year, month, kind)(xi)
+    prcp = _get_NOAA_interpolator('PRCP', year, month, kind)(xi)
+    return pd.DataFrame({
+        'LONGITUDE': xi[:, 0],
+        'LATITUDE': xi[:, 1],
+        'HETSTRS': prcp * (tavg - 20),
+    }).dropna()
+
+
+def interpolate_NOAA_map(var, year, month, kind, step=1.0):
     '''Generate a map of NOAA data .
 
+    <step> is the grid spacing in degrees; 1.0 reproduces the historical
+    one-degree grid, while coarser values shrink the evaluation
+    quadratically for quick passes.
+
     Possible enhancement to get better coverage of mid-Pacific and high latitudes would be to extend
     the data set to east and west by copying it over with +360 and -360 degree adjustments to the longitude.
     However, since the affected areas have low populations, the effect this would have on predictions for cities is minimal.
     Also, the resulting values for the affected areas would be interpolated between a small number of independent,
     widely-separated points.
     '''
-    xi = array([
-        [x, y]
-        for x in range(-180, 180)
-        for y in range(-90, 90)
-    ])
-    return interpolation_NOAA_points(var, year, month, kind, xi)
+    return interpolation_NOAA_points(var, year, month, kind, _xi_grid(step))
 
 
-def interpolate_NOAA(var, year, month, kind='linear'):
+def interpolate_NOAA(var, year, month, kind='linear', step=1.0):
     '''Create 2D interpolated map across available observations.
 
-    <kind> is one of {'nearest', 'linear', 'cubic'}, according to the desired
-    order of the interpolating piecewise polynomial. The default is 'linear'.
-    
+    <kind> is one of {'nearest', 'linear', 'cubic', 'idw'}; the polynomial
+    kinds select the order of the interpolating piecewise polynomial, and
+    'idw' selects inverse-distance weighting over the nearest stations.
+    The default is 'linear'.
+
     https://docs.scipy.org/doc/scipy/reference/generated/scipy.interpolate.interp2d.html
     '''
-    return interpolate_NOAA_map(var, year, month, kind=kind)
+    return interpolate_NOAA_map(var, year, month, kind=kind, step=step)
+
+
+def _write_interpolated(var, year, month, xi, values):
+    '''Store one interpolated variable-month grid.
+
+    Parquet stores the columns as typed binary, so these grids skip
+    float formatting on write and re-parsing on every downstream load.
+    '''
+    pd.DataFrame({
+        'LONGITUDE': xi[:, 0],
+        'LATITUDE': xi[:, 1],
+        var: values,
+    }).dropna().to_parquet(
+        join(
+            get_settings()['noaa']['interpolated_dir'],
+            f'{var}{year}-{month}.parquet'
+        ),
+        compression='zstd',
+        index=False
+    )
+
+
+def _interpolate_month(year, month, method='linear'):
+    '''Interpolate and store every variable for one month.
+
+    Module-level (rather than nested in interpolate_all_NOAA) so it
+    pickles cleanly into worker processes. Handling a whole month in one
+    worker lets HUMID and HETSTRS derive from the month's TAVG and PRCP
+    arrays directly instead of re-interpolating them in a process that
+    shares no caches with the one that already did.
+    '''
+    xi = _xi_grid(1.0)
+    interpolated = {}
+    for var in sorted(DATA_COLUMNS):
+        print(f'Interpolating for {var}{year}-{month}')
+        stdout.flush()
+        try:
+            interpolated[var] = _get_NOAA_interpolator(
+                var, year, month, method
+            )(xi)
+        except FileNotFoundError as exc:
+            print(f'Missing data for {var}{year}-{month}: {exc}')
+    if 'TAVG' in interpolated and 'PRCP' in interpolated:
+        # The derived variables are elementwise arithmetic on the already
+        # aligned TAVG and PRCP grids; no further interpolation needed.
+        tavg = interpolated['TAVG']
+        prcp = interpolated['PRCP']
+        interpolated['HUMID'] = prcp * (tavg + 273.15)
+        interpolated['HETSTRS'] = prcp * (tavg - 20)
+    for var, values in interpolated.items():
+        _write_interpolated(var, year, month, xi, values)
 
 
 def interpolate_all_NOAA(method='linear'):
     '''Loop over NOAA data, doing interpolation stage of processing.
 
     Loop over all variables, months, and years to interpolate and store all NOAA
-    data.
+    data. The ~320 months are independent and each is CPU-bound on its
+    triangulations, so they fan out over worker processes.
     '''
-    for var in INTERPOLATION_COLUMNS:
-        print(f'------Interpolating for {var}')
-        for year in range(1995, 2022):
-            print(f'##Interpolating for {var}{year}')
-            for month in range(1, 13):
-                print(f'Interpolating for {var}{year}-{month}')
-                stdout.flush()
-                try:
-                    interpolated = interpolate_NOAA(
-                        var=var,
-                        year=year,
-                        month=month,
-                        kind=method
-                    )
-                except FileNotFoundError as exc:
-                    print(f'Missing data for {var}{year}-{month}: {exc}')
-                else:
-                    interpolated.to_csv(
-                        join(
-                            settings['noaa']['interpolated_dir'],
-                            f'{var}{year}-{month}.csv'
-                        ),
-                        index=False
-                    )
+    with ProcessPoolExecutor() as executor:
+        futures = [
+            executor.submit(_interpolate_month, year, month, method)
+            for year in range(1995, 2022)
+            for month in range(1, 13)
+        ]
+        # Surface any worker exception instead of failing silently.
+        for future in futures:
+            future.result()
@@ -17,14 +17,16 @@ via (low, avg, high) values for precipitation and temperature.
 '''
 import pandas as pd
 
-from csv import DictReader, DictWriter
+from csv import DictReader
 
-from os import listdir, remove
-from os.path import join
+from functools import lru_cache
+
+from os import remove, scandir
+from os.path import isfile, join
 
 from pprint import pformat
-from sys import stdout
-from yaml import safe_load
+
+from .._settings import get_settings
 
 # Lower-level / independent functions are near the top.
 # Functions which depend on them are further down.
@@ -56,8 +58,15 @@ DATA_COLUMNS = {
 #    "TMIN_ATTRIBUTES",
 }
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+
+# Every cached grid file stores these position columns plus one data
+# column; float32 is exact at the grid resolutions in use and halves the
+# bytes parsed and held per read.
+GRID_POSITION_DTYPES = {
+    'LONGITUDE': 'float32',
+    'LATITUDE': 'float32',
+}
+
 
 # Functions with only external dependencies
 
@@ -76,19 +85,58 @@ def read_source_header(source_file, id_fields, data_fields):
     return source, filtered_data_fields
 
 
-def _to_be_written(var, source_row, date_str):
-    '''Return True iff this row should be written out.'''
-    if not (var in source_row):
-        return False
-    if source_row[var]=='':
-        return False
-    return (source_row['DATE']==date_str)
+def read_cached_csv(csv_path, columns=None, dtype=None):
+    '''Read a cached table, preferring a Parquet sibling when one exists.
+
+    Parquet is columnar and binary, so it loads several times faster than the
+    text CSV it mirrors and takes a fraction of the disk space. Caches which
+    have not been through convert_csv_cache_to_parquet() fall back to the
+    original CSV.
 
+    If <columns> is given, only those columns are read; the CSV fallback then
+    also uses the multi-threaded pyarrow parser. <dtype> is an optional
+    column-to-dtype mapping applied on read.
+    '''
+    parquet_path = csv_path[:-len('.csv')] + '.parquet'
+
+    if isfile(parquet_path):
+        df = pd.read_parquet(parquet_path, columns=columns)
+        return df if dtype is None else df.astype(dtype)
+
+    if columns is not None:
+        return pd.read_csv(
+            csv_path,
+            engine='pyarrow',
+            usecols=columns,
+            dtype=dtype
+        )
 
+    return pd.read_csv(csv_path)
+
+
+def convert_csv_cache_to_parquet(directory):
+    '''One-time conversion of a cache directory's CSV files to Parquet.'''
+    with scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith('.csv'):
+                print(f'Converting {entry.name}')
+                pd.read_csv(entry.path).to_parquet(
+                    entry.path[:-len('.csv')] + '.parquet'
+                )
+
+
+@lru_cache(maxsize=16)
 def load_compiled_NOAA(var, year, month):
-    '''Load NOAA data for a single variable in a given month.'''
-    return pd.read_csv(
-        join(settings['noaa']['compiled_dir'], f'{var}{year}-{month}.csv')
+    '''Load NOAA data for a single variable in a given month.
+
+    Cached because interpolation and plotting both pull the same
+    variable-months repeatedly (HUMID and HETSTRS each re-read TAVG and
+    PRCP). Callers must treat the returned frame as read-only.
+    '''
+    return read_cached_csv(
+        join(get_settings()['noaa']['compiled_dir'], f'{var}{year}-{month}.csv'),
+        columns=['LONGITUDE', 'LATITUDE', var],
+        dtype={**GRID_POSITION_DTYPES, var: 'float32'}
     )
 
 # Functions with internal dependencies
@@ -115,22 +163,18 @@ def _trim_open_csv(
 
     all_fields = set(id_fields) | avail_data
 
-    with open(output_name, 'w') as dest_file:
-        destination = DictWriter(dest_file, fieldnames=all_fields, dialect='unix')
-        destination.writeheader()
-        written = 0
-        
-        for source_row in source:
-            if source_row['DATE'] >= min_date:
-                written += 1
-                dest_row = {
-                    key: value
-                    for key, value in source_row.items()
-                    if key in all_fields
-                }
-                destination.writerow(dest_row)
-
-    if not written:
+    # Filter in pandas rather than one dict-allocating DictReader row at a
+    # time; the date comparison and column trim both vectorize, and
+    # to_csv's C formatter replaces per-row DictWriter calls. dtype=str
+    # passes values through verbatim, as the csv module did.
+    source_file.seek(0)
+    df = pd.read_csv(source_file, usecols=list(all_fields), dtype=str)
+    df = df[df['DATE'] >= min_date]
+    written = len(df)
+
+    if written:
+        df.to_csv(output_name, index=False)
+    else:
         print(f'Skipping since it has no data since before {min_date}.')
         try:
             remove(output_name)
@@ -189,22 +233,26 @@ def trim_NOAA(source_dir, dest_dir):
     record_count = 0
     counts = {field: 0 for field in DATA_COLUMNS}
     
-    for filename in listdir(source_dir):
-        source_path = join(source_dir, filename)
-        dest_path = join(dest_dir, filename)
-
-        if filename.endswith('.csv'):
-            print(f'Trimming {filename}')
-            rows, columns = trim_file(source_path, dest_path, '1995-01')
-
-            for col in columns:
-                counts[col] += rows
-            
-            if rows:
-                file_count += 1
-                record_count += rows
-        else:
-            print(f'Skipping {filename}.')
+    # scandir yields ready-made paths without the per-name stat that a
+    # listdir-plus-isfile pass would pay on a 100k-file directory.
+    with scandir(source_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.csv'):
+                print(f'Trimming {entry.name}')
+                rows, columns = trim_file(
+                    entry.path,
+                    join(dest_dir, entry.name),
+                    '1995-01'
+                )
+
+                for col in columns:
+                    counts[col] += rows
+
+                if rows:
+                    file_count += 1
+                    record_count += rows
+            else:
+                print(f'Skipping {entry.name}.')
 
     print(f'Wrote {record_count} rows across {file_count} files.')
     print(
@@ -222,61 +270,64 @@ def _print_group_update(full_in_files, used_in_files, in_records):
     ) 
 
 
-def _make_one_group(source_dir, dest_dir, var, year, month, source_list):
-    '''Write a single one of the regrouped output files.'''
-    out_cols = ['LONGITUDE', 'LATITUDE', var]
-    date_str = f'{year}-{month:02}'
-    dest_name = join(dest_dir, f'{var}{year}-{month}.csv')
-    print(f'Writing to {dest_name}')
-    stdout.flush()
+def group_NOAA(source_dir, dest_dir):
+    '''Group all NOAA observations into separate files by month and variable.
+
+    Each source file is read exactly once and its rows are fanned out to
+    the per-(variable, month) destination files. The old structure looped
+    over (year, month, variable) and re-scanned every source file for
+    each combination, so each station file was read ~2000 times.
+    '''
+    with scandir(source_dir) as entries:
+        source_list = [
+            entry.path for entry in entries if entry.name.endswith('.csv')
+        ]
+
     full_in_files = 0
     used_in_files = 0
     out_records = 0
+    # The first write to a destination in this run truncates it and adds
+    # the header; later source files append to it.
+    started = set()
+
+    for source_path in source_list:
+        full_in_files += 1
+        avail = sorted(
+            DATA_COLUMNS & set(pd.read_csv(source_path, nrows=0).columns)
+        )
 
-    with open(dest_name, 'w') as dest_fp:
-        writer = DictWriter(dest_fp, fieldnames=out_cols, dialect='unix')
-        writer.writeheader()
-                    
-        for source_name in source_list:
-            full_in_files += 1
-            
-            with open(join(source_dir, source_name), 'r') as source_fp:
-                reader_dict = DictReader(source_fp)
-                used_this = False
-
-                for source_row in reader_dict:
-                    if _to_be_written(var, source_row, date_str):
-                        used_this = True
-                        out_records += 1
-                        writer.writerow({
-                            col: source_row[col]
-                            for col in out_cols
-                        })
-
-                if used_this:
-                    used_in_files += 1
-            
-            if full_in_files % 10000 == 0:
-                _print_group_update(full_in_files, used_in_files, out_records)
+        if avail:
+            df = pd.read_csv(
+                source_path,
+                usecols=['DATE', 'LONGITUDE', 'LATITUDE'] + avail,
+                dtype=str
+            )
+            df = df[('1995-01' <= df['DATE']) & (df['DATE'] <= '2021-12')]
+            used_this = False
+
+            for var in avail:
+                subset = df[df[var].notna()]
+                used_this = used_this or len(subset) > 0
+                out_records += len(subset)
+
+                for date_str, group in subset.groupby('DATE', sort=False):
+                    year, month = date_str.split('-')
+                    dest_name = join(
+                        dest_dir, f'{var}{year}-{int(month)}.csv'
+                    )
+                    mode = 'a' if dest_name in started else 'w'
+                    started.add(dest_name)
+                    group[['LONGITUDE', 'LATITUDE', var]].to_csv(
+                        dest_name,
+                        mode=mode,
+                        header=(mode == 'w'),
+                        index=False
+                    )
+
+            if used_this:
+                used_in_files += 1
+
+        if full_in_files % 10000 == 0:
+            _print_group_update(full_in_files, used_in_files, out_records)
 
     _print_group_update(full_in_files, used_in_files, out_records)
-    
-    if not out_records:
-        remove(dest_name)
-
-
-def group_NOAA(source_dir, dest_dir):
-    '''Group all NOAA observations into separate files by month and variable.'''
-    source_list = listdir(source_dir)
-    
-    for year in range(1995, 2022):
-        for month in range(1, 13):
-            for var in DATA_COLUMNS:
-                _make_one_group(
-                    source_dir,
-                    dest_dir,
-                    var,
-                    year,
-                    month,
-                    source_list
-                )
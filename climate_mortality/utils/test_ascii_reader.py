@@ -1,11 +1,14 @@
 '''Tests for files.py'''
 from unittest import TestCase
 
+from numpy import array
+
 from .ascii_reader import (
     ASCIIFormat,
     asc_to_array,
     asc_to_filtered_csv,
     check_bounds,
+    check_bounds_array,
     DataOutOfBoundsError,
     read_token,
     skip_this_ndx,
@@ -35,7 +38,17 @@ class ASCIITest(TestCase):
             check_bounds(-2.0, 'mm')
         with self.assertRaises(DataOutOfBoundsError):
             check_bounds(200000.0, 'mm')
-    
+
+    def test_bounds_array(self):
+        self.assertTrue(check_bounds_array(array([-12.0, 0.0, 38.5]), 'Celsius'))
+        self.assertTrue(check_bounds_array(array([23.0, 4023.0]), 'mm'))
+        # Empty arrays are trivially in bounds.
+        self.assertTrue(check_bounds_array(array([]), 'Celsius'))
+        with self.assertRaises(DataOutOfBoundsError):
+            check_bounds_array(array([23.0, -280.0]), 'Celsius')
+        with self.assertRaises(DataOutOfBoundsError):
+            check_bounds_array(array([23.0, 200000.0]), 'mm')
+
     def test_read_token(self):
         expected_first =             [
             'ncols',
@@ -115,29 +128,34 @@ class ASCIITest(TestCase):
     # Test functions with internal dependencies.
 
     def test_asc_to_array(self):
-        arr = asc_to_array(TEST_ASC, dimension='mm')
-        self.assertTrue(len(arr) <= 100 * 101)
-        
+        longitude, latitude, values = asc_to_array(TEST_ASC, dimension='mm')
+        self.assertTrue(len(values) <= 100 * 101)
+
         # The smaller the values of xskip & yskip, the longer the test runs.s
         xskip = 3
         yskip = 3
-        arr = asc_to_array(TEST_ASC, xskip=xskip, yskip=yskip, dimension='mm')
-        self.assertTrue(len(arr) > 0)  # Confirm we read _something_
+        longitude, latitude, values = asc_to_array(
+            TEST_ASC,
+            xskip=xskip,
+            yskip=yskip,
+            dimension='mm'
+        )
+        self.assertTrue(len(values) > 0)  # Confirm we read _something_
         self.assertTrue(  # Confirm we didn't read more than max expected
-            len(arr) <= (100 * 101 / ((xskip+1) * (yskip+1)))
+            len(values) <= (100 * 101 / ((xskip+1) * (yskip+1)))
         )
-        # Check first elementin detail
-        self.assertEqual(len(arr[0]), 3)
-        self.assertAlmostEqual(arr[0][0], -119.99999687076, 4)
-        self.assertAlmostEqual(arr[0][2], 79.0, 4)
-        
+        # The three arrays form parallel columns of equal length.
+        self.assertEqual(len(longitude), len(values))
+        self.assertEqual(len(latitude), len(values))
+        # Check first element in detail
+        self.assertAlmostEqual(longitude[0], -119.99999687076, 4)
+        self.assertAlmostEqual(values[0], 79.0, 4)
+
         with open(TEST_ASC, 'r') as fp:
             fmt = ASCIIFormat(fp)
 
-        longitude = [loc[0] for loc in arr]
-        self.assertGreaterEqual(min(longitude), fmt.xllcorner)
-        latitude = [loc[1] for loc in arr]
-        self.assertGreaterEqual(min(latitude), fmt.yllcorner)
+        self.assertGreaterEqual(longitude.min(), fmt.xllcorner)
+        self.assertGreaterEqual(latitude.min(), fmt.yllcorner)
         
     # Test classes.
 
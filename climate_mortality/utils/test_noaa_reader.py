@@ -11,8 +11,7 @@ from .noaa_reader import (
     DATA_COLUMNS,
     ID_COLUMNS,
     read_source_header,
-    _print_group_update,
-    _to_be_written
+    _print_group_update
 )
 
 
@@ -58,24 +57,3 @@ class NOAATest(TestCase):
         in_records = randint(0, 5000000)
         _print_group_update(full_in_files, used_in_files, in_records)
 
-    def test__to_be_written(self):
-        # True
-        self.assertTrue(
-            _to_be_written('ao', {'ao': '5', 'DATE': 'today'}, 'today')
-        )
-
-        # False - missing key
-        self.assertFalse(
-            _to_be_written('aka', {'ao': '5', 'DATE': 'today'}, 'today')
-        )
-
-        # False - missing value
-        self.assertFalse(
-            _to_be_written('aka', {'aka': '', 'DATE': 'today'}, 'today')
-        )
-
-        # False - wrong date
-        self.assertFalse(
-            _to_be_written('aka', {'ao': '5', 'DATE': 'today'}, 'tomorrow')
-        )
-
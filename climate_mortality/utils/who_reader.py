@@ -2,14 +2,13 @@
 
 import pandas as pd
 
-from csv import DictReader, DictWriter
-
-from os import listdir, remove
+from os import remove, scandir
 from os.path import isfile, join
 
 from pprint import pformat
 from sys import stdout
-from yaml import safe_load
+
+from .._settings import get_settings
 
 SEX_DICT = {
     1: 'Male',
@@ -22,65 +21,63 @@ SEX = pd.DataFrame.from_dict([
 ])
 
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+# Columns carried into the per-cause mortality tables.
+CAUSE_COLUMNS = [
+    'CountryName',
+    'Year',
+    'Gender',
+    'MortAll',
+    'Mort0',
+    'Mort1-4',
+    'Mort5-14',
+    'Mort15-24',
+    'Mort25-34',
+    'Mort35-44',
+    'Mort45-54',
+    'Mort55-64',
+    'Mort65+',
+    'MortUnk',
+]
 
 
-def _collect_causes():
-    '''Scan all processed WHO country files to assemble distinct causes.'''
-    country_dir = settings['who']['country_output_dir']
-    causes = set()
-    
-    for fname in listdir(country_dir):
-        if fname.endswith('_mortality.csv'):
-            print(f'Scanning {fname}')
-            causes |= set(pd.read_csv(join(country_dir, fname))['Cause'])
-
-    return sorted(causes)
-    
-
-def _trim_country_file_to_cause(country_file, cause):
-    '''Remove all columns and records not matchnig the cause from the file.'''
-    raw_df = pd.read_csv(country_file)
-    return raw_df[raw_df['Cause']==cause][[
-        'CountryName',
-        'Year',
-        'Gender',
-        'MortAll',
-        'Mort0',
-        'Mort1-4',
-        'Mort5-14',
-        'Mort15-24',
-        'Mort25-34',
-        'Mort35-44',
-        'Mort45-54',
-        'Mort55-64',
-        'Mort65+',
-        'MortUnk',
-    ]].fillna(0)
-    
-
 def _safe_file_name(raw):
     '''Replace inconvenient characters in filenames.'''
     return raw.replace(' ', '_').replace('\\', '_').replace('/', '_')
 
 def convert_country_tables_to_causes():
-    '''Convert country_output_dir files to cause_output_dir.'''
-    causes = _collect_causes()
-    country_dir = settings['who']['country_output_dir']
-    cause_dir = settings['who']['cause_output_dir']
-    country_files = listdir(country_dir)
-    print(f'Collected {len(causes)} distinct causes of death.')
-    
-    for cause in causes:
+    '''Convert country_output_dir files to cause_output_dir.
+
+    Each country file is read exactly once; the combined table then
+    splits by cause. The old structure re-read every country file for
+    every cause, which multiplied the reads by the number of causes.
+    '''
+    country_dir = get_settings()['who']['country_output_dir']
+    cause_dir = get_settings()['who']['cause_output_dir']
+
+    with scandir(country_dir) as entries:
+        country_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.endswith('_mortality.csv')
+        ]
+
+    combined = pd.concat(
+        [
+            pd.read_csv(path, usecols=CAUSE_COLUMNS + ['Cause'])
+            for path in country_paths
+        ],
+        ignore_index=True
+    )
+    print(
+        'Collected {} distinct causes of death.'.format(
+            combined['Cause'].nunique()
+        )
+    )
+
+    for cause, cause_df in combined.groupby('Cause', sort=False):
         print(f'Collecting {cause} records')
         stdout.flush()
-        cause_df = pd.concat([
-            _trim_country_file_to_cause(join(country_dir, fname), cause)
-            for fname in country_files
-            if fname.endswith('_mortality.csv')
-        ])
-        cause_df.to_csv(
+        cause_df[CAUSE_COLUMNS].fillna(0).to_csv(
             join(cause_dir, _safe_file_name(cause + '_mortality.csv')),
             index=False
         )
@@ -99,80 +96,66 @@ def load_cause_for_file(path, cause):
 
 def load_WHO_mortality(country, years):
     mort = pd.read_csv(
-        join(settings['who']['country_output_dir'], f'{country}_mortality.csv')
+        join(get_settings()['who']['country_output_dir'], f'{country}_mortality.csv')
     )
 
 
 def load_cause(cause):
     '''Load the full set of mortality metrics for a given cause of death.'''
-    mort_dir = settings['who']['country_output_dir']
-    df_list = [
-        load_cause_for_file(join(mort_dir, fn))
-        for fn in listdir(mort_dir)
-        if fn.endswith('_mortality.csv')
-    ]
+    mort_dir = get_settings()['who']['country_output_dir']
+
+    with scandir(mort_dir) as entries:
+        df_list = [
+            load_cause_for_file(entry.path)
+            for entry in entries
+            if entry.name.endswith('_mortality.csv')
+        ]
+
     return pd.concat(df_list)
 
 
 # Functions with only external dependencies
 
 def _consolidate_age_columns(df, new_col, col_list):
-    '''Combine and remove <col_list>, moving all numbers into <new_col>.'''
-    df[new_col] = df[col_list[0]]
-    del df[col_list[0]]
-    n = 1
-    
-    while n < len(col_list):
-        df[new_col] = df[new_col] + df[col_list[n]]
-        del df[col_list[n]]
-        n += 1
-    
-    return df
+    '''Combine and remove <col_list>, moving all numbers into <new_col>.
+
+    One row-wise sum over the whole column block replaces the old
+    add-then-delete loop, which rebuilt the frame's internal blocks once
+    per source column.
+    '''
+    df[new_col] = df[col_list].sum(axis=1)
+    return df.drop(columns=col_list)
 
 # Functions with internal dependencies
 
+# The coarsest WHO age format ("08") groups the fine-grained age columns
+# like so; Pop1 (all ages), Pop2 (under 1) and Pop26 (unknown) pass through.
+AGE_GROUP_COLUMNS = {
+    '1-4': ['Pop3', 'Pop4', 'Pop5', 'Pop6'],
+    '5-14': ['Pop7', 'Pop8'],
+    '15-24': ['Pop9', 'Pop10'],
+    '25-34': ['Pop11', 'Pop12'],
+    '35-44': ['Pop13', 'Pop14'],
+    '45-54': ['Pop15', 'Pop16'],
+    '55-64': ['Pop17', 'Pop18'],
+    '65+': ['Pop19', 'Pop20', 'Pop21', 'Pop22', 'Pop23', 'Pop24', 'Pop25'],
+}
+
+
 def _consolidate_age_groups(raw_population, prefix):
-    '''Combine the age columns.'''
-    population = _consolidate_age_columns(
-        raw_population,
-        prefix + '1-4',
-        ['Pop3', 'Pop4', 'Pop5', 'Pop6']
-    )
-    population = _consolidate_age_columns(
-        population,
-        prefix + '5-14',
-        ['Pop7', 'Pop8']
-    )
-    population = _consolidate_age_columns(
-        population,
-        prefix + '15-24',
-        ['Pop9', 'Pop10']
-    )
-    population = _consolidate_age_columns(
-        population,
-        prefix + '25-34',
-        ['Pop11', 'Pop12']
-    )
-    population = _consolidate_age_columns(
-        population,
-        prefix + '35-44',
-        ['Pop13', 'Pop14']
-    )
-    population = _consolidate_age_columns(
-        population,
-        prefix + '45-54',
-        ['Pop15', 'Pop16']
-    )
-    population = _consolidate_age_columns(
-        population,
-        prefix + '55-64',
-        ['Pop17', 'Pop18']
-    )
-    return _consolidate_age_columns(
-        population,
-        prefix + '65+',
-        ['Pop19', 'Pop20','Pop21', 'Pop22', 'Pop23', 'Pop24', 'Pop25']
-    )
+    '''Combine the age columns.
+
+    All eight consolidated columns are assigned in one pass, so the frame
+    is rebuilt once rather than once per age group.
+    '''
+    return raw_population.assign(**{
+        prefix + suffix: raw_population[col_list].sum(axis=1)
+        for suffix, col_list in AGE_GROUP_COLUMNS.items()
+    }).drop(columns=[
+        col
+        for col_list in AGE_GROUP_COLUMNS.values()
+        for col in col_list
+    ])
 
 
 def _process_pop_df(raw_population):
@@ -194,13 +177,80 @@ def _process_pop_df(raw_population):
     return population
 
 
+# The mortality counterpart of AGE_GROUP_COLUMNS, in the same coarsest
+# WHO age format; Deaths1 (all ages), Deaths2 (under 1) and Deaths26
+# (unknown) map through one-to-one.
+DEATH_GROUP_COLUMNS = {
+    'All': ['Deaths1'],
+    '0': ['Deaths2'],
+    '1-4': ['Deaths3', 'Deaths4', 'Deaths5', 'Deaths6'],
+    '5-14': ['Deaths7', 'Deaths8'],
+    '15-24': ['Deaths9', 'Deaths10'],
+    '25-34': ['Deaths11', 'Deaths12'],
+    '35-44': ['Deaths13', 'Deaths14'],
+    '45-54': ['Deaths15', 'Deaths16'],
+    '55-64': ['Deaths17', 'Deaths18'],
+    '65+': [
+        'Deaths19', 'Deaths20', 'Deaths21', 'Deaths22', 'Deaths23',
+        'Deaths24', 'Deaths25'
+    ],
+    'Unk': ['Deaths26'],
+}
+
+
+def _consolidate_mortality_chunk(df):
+    '''Reduce one block of raw Morticd10 rows to the coarse age groups.'''
+    death_columns = [f'Deaths{n}' for n in range(1, 27)]
+    df[death_columns] = df[death_columns].fillna(0)
+    return pd.DataFrame({
+        'Country': df['Country'],
+        'Year': df['Year'].astype('int16'),
+        'ListCause': df['List'].map(str) + '-' + df['Cause'].map(str),
+        'Gender': df['Sex'].map(SEX_DICT).fillna('Unspecified'),
+        **{
+            # float32 keeps full precision for these counts and halves
+            # the frame's memory.
+            'Deaths' + suffix: df[col_list].sum(axis=1).astype('float32')
+            for suffix, col_list in DEATH_GROUP_COLUMNS.items()
+        }
+    })
+
+
+def _read_mortality_file(path):
+    '''Read one Morticd10 CSV with the age columns pre-consolidated.
+
+    A chunked pandas read with a vectorized age-group sum replaces the
+    old per-row DictReader scan, which allocated a dict and ran 26
+    float() calls for every row, once per country. Chunking bounds peak
+    memory on the biggest Morticd10 parts: the 26 raw death columns of a
+    chunk are condensed to the 11 coarse groups before the next chunk is
+    parsed, so the full-width frame never materializes at once.
+    '''
+    print(f'Reading {path}')
+    stdout.flush()
+    death_columns = [f'Deaths{n}' for n in range(1, 27)]
+    chunks = pd.read_csv(
+        path,
+        usecols=['Country', 'List', 'Cause', 'Year', 'Sex'] + death_columns,
+        chunksize=500_000
+    )
+    combined = pd.concat(
+        [_consolidate_mortality_chunk(chunk) for chunk in chunks],
+        ignore_index=True
+    )
+
+    # A few hundred distinct values across millions of rows: categorical
+    # codes cut the memory ~10x and make merge/groupby key comparisons
+    # integer-sized. Cast after the concat so all chunks share one
+    # category set.
+    for col in ['ListCause', 'Gender']:
+        combined[col] = combined[col].astype('category')
+
+    return combined
+
+
 def _prepare_mortality_df(source_mort_paths, dest_dir, population, causes):
     '''Process and return the raw mortality data.'''
-    # Create reference list of columns that are safe to convert to numbers.
-    numerical_columns = [
-        'Year',
-        'Sex'
-    ] + [f'Deaths{n}' for n in range(1, 27)]
     suffixes = [
         'All',
         '0',
@@ -215,99 +265,78 @@ def _prepare_mortality_df(source_mort_paths, dest_dir, population, causes):
         'Unk'
     ]
     print('Reading mortality data from {}'.format(pformat(source_mort_paths)))
-    
-    for country_num in set(population['Country']):
-        country_name = set(
-            population[population['Country']==country_num]['CountryName']
-        ).pop()
-        print(f'Aggregating {country_name} (#{country_num}) data.')
+    # Each source file is read exactly once; the old structure re-scanned
+    # every file for every country.
+    mort_df = pd.concat(
+        [_read_mortality_file(path) for path in source_mort_paths],
+        ignore_index=True
+    )
+
+    # One hash-join against population replaces the per-country masking
+    # of the mortality frame; validate catches any duplicate
+    # (Country, Year, Gender) rows in population before they silently
+    # fan the mortality rows out.
+    dead = pd.merge(
+        left=mort_df,
+        on=('Country', 'Year', 'Gender'),
+        right=population,
+        validate='many_to_one'
+    )
+    dead.rename(
+        columns={'Pop1': 'PopAll', 'Pop2': 'Pop0', 'Pop26': 'PopUnk'},
+        inplace=True
+    )
+    # All eleven mortality ratios in a single assign: one frame rebuild
+    # instead of one per suffix.
+    dead = dead.assign(**{
+        'Mort' + suffix: dead['Deaths' + suffix] / dead['Pop' + suffix]
+        for suffix in suffixes
+    })
+
+    mort = pd.merge(left=dead, on='ListCause', right=causes, how='left')
+    mort['Cause'] = mort['Cause'].where(
+        mort['Cause'].notnull(),
+        other=mort['ListCause']
+    )
+    del mort['List']
+    del mort['Code']
+    del mort['Detailed code']
+
+    written_countries = set()
+
+    for (country_num, country_name), group in mort.groupby(
+        ['Country', 'CountryName'],
+        sort=False
+    ):
+        print(
+            'Writing {} records and {} columns for {} (#{}).'.format(
+                group.shape[0],
+                group.shape[1],
+                country_name,
+                country_num
+            )
+        )
         stdout.flush()
-        records = []
-        
-        for filename in source_mort_paths:
-            print(f'Checking {filename}')
-            
-            with open(filename, 'r') as fp:
-                reader = DictReader(fp)
-                
-                # Filter the source file and drop columns we don't need.
-                for row in reader:
-                    if int(row['Country']) == int(country_num):
-                        list_cause = '{}-{}'.format(
-                            row['List'],
-                            row['Cause']
-                        )
-                        row = { # convert blanks to 0
-                            k: float(row[k]) if row[k] else 0
-                            for k in numerical_columns
-                        }
-                        records.append({
-                            'Country': country_num,
-                            'CountryName': country_name,
-                            'Year': row['Year'],
-                            'ListCause': list_cause,
-                            'Gender': SEX_DICT.get(row['Sex'], 'Unspecified'),
-                            'DeathsAll': row['Deaths1'],
-                            'Deaths0': row['Deaths2'],
-                            'Deaths1-4': row['Deaths3'] + row['Deaths4'] + row['Deaths5'] +row['Deaths6'],
-                            'Deaths5-14': row['Deaths7'] + row['Deaths8'],
-                            'Deaths15-24': row['Deaths9'] + row['Deaths10'],
-                            'Deaths25-34': row['Deaths11'] + row['Deaths12'],
-                            'Deaths35-44': row['Deaths13'] + row['Deaths14'],
-                            'Deaths45-54': row['Deaths15'] + row['Deaths16'],
-                            'Deaths55-64': row['Deaths17'] + row['Deaths18'],
-                            'Deaths65+': row['Deaths19'] + row['Deaths20'] + row['Deaths21'] + row['Deaths22'] + row['Deaths23'] + row['Deaths24'] + row['Deaths25'],
-                            'DeathsUnk': row['Deaths26']
-                        })
-        
+        group.to_csv(
+            join(dest_dir, '{}_mortality.csv'.format(country_name)),
+            index=False
+        )
+        written_countries.add(country_num)
+
+    # One pass over population builds the number-to-name map; the old
+    # per-country boolean mask re-scanned the whole frame each time.
+    country_names = population.drop_duplicates('Country').set_index(
+        'Country'
+    )['CountryName'].to_dict()
+
+    # Clear stale outputs for countries the join produced no rows for.
+    for country_num in set(country_names) - written_countries:
+        country_name = country_names[country_num]
+        print(f'Found no records for {country_name}')
         output_path = join(dest_dir, '{}_mortality.csv'.format(country_name))
 
-        if len(records) > 0:
-            print(f'Found {len(records)} death records.')
-            dead = pd.DataFrame.from_dict(records)
-            dead = pd.merge(
-                left=dead,
-                on=('CountryName', 'Year', 'Country', 'Gender'),
-                right=population
-            )
-            dead.rename(
-                columns={'Pop1': 'PopAll', 'Pop2': 'Pop0', 'Pop26': 'PopUnk'},
-                inplace=True
-            )
-            
-            for suffix in suffixes:
-                dead['Mort'+suffix] = dead['Deaths'+suffix]/dead['Pop'+suffix]
-
-            mort = pd.merge(left=dead, on='ListCause', right=causes, how='left')
-            mort['Cause'] = mort['Cause'].where(
-                mort['Cause'].notnull(),
-                other=mort['ListCause']
-            )
-            if mort.shape[0] > 0:
-                print(
-                    f'Writing {mort.shape[0]} records and {mort.shape[1]} columns.'
-                ) 
-                del mort['List']
-                del mort['Code']
-                del mort['Detailed code']
-                mort.to_csv(
-                    output_path,
-                    index=False
-                )
-            else:
-                print(
-                    'Failed to recognize any codes for {} (#{}): e.g. {}'.format(
-                        country_name,
-                        country_num,
-                        list(set(dead['ListCause']))[:10]
-                    )
-                )
-                if isfile(output_path):
-                    remove(output_path)
-        else:
-            print(f'Found no records for {country_name}')
-            if isfile(output_path):
-                remove(output_path)
+        if isfile(output_path):
+            remove(output_path)
     # Need mortality['List'] to correctly interpret mortality['Cause']
     # TODO: Check sum against "all ages" column Pop1
     # TODO: Handle "IM" columns (infant mortality)
@@ -359,11 +388,12 @@ def process_WHO_dead(source_dir, dest_dir, supp_dir):
     '''
     # Process the raw population counts, via Pandas for simplicity
     population = pd.read_csv(join(dest_dir, 'population.csv'))
-    source_mort_paths = [
-        join(source_dir, fname)
-        for fname in listdir(source_dir)
-        if fname.endswith('.csv') and fname.startswith('Morticd10')
-    ]
+    with scandir(source_dir) as entries:
+        source_mort_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.startswith('Morticd10') and entry.name.endswith('.csv')
+        ]
     causes = pd.read_csv(join(supp_dir, 'WHOCauseCodes.csv'))
     _prepare_mortality_df(
         source_mort_paths,
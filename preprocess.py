@@ -1,8 +1,8 @@
 '''Consolidate data files.'''
 
 from os.path import join
-from yaml import safe_load
 
+from climate_mortality._settings import get_settings
 from climate_mortality.utils.annualized import annualize_all_NOAA
 from climate_mortality.utils.ascii_reader import filter_tree
 from climate_mortality.utils.noaa_reader import group_NOAA, trim_NOAA
@@ -17,8 +17,7 @@ from climate_mortality.utils.connect_noaa_who import (
     join_mortality_climate
 )
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+settings = get_settings()
 
 
 def process_WHO():
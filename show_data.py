@@ -7,8 +7,8 @@ import pandas as pd
 import plotly.graph_objects as go
 
 from os.path import join
-from yaml import safe_load
 
+from climate_mortality._settings import get_settings
 from climate_mortality.display.plot_cmip5 import plot_CMIP5_samples
 from climate_mortality.display.plot_noaa import (
     plot_NOAA_annualized,
@@ -25,15 +25,11 @@ from climate_mortality.display.plot_mixed import (
 )
 
 
-with open('./files.yaml', 'r') as fp:
-    settings = safe_load(fp)
+settings = get_settings()
 
 ##### Script entry point #####
 
 if __name__ == '__main__':
-    with open('./files.yaml', 'r') as fp:
-        settings = safe_load(fp)
-
     # Comment out plots which don't need to be regenerated.
     # plot_NOAA_samples()
     # plot_WHO_samples()